@@ -1,22 +1,36 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import feedparser
 import time
+import os
 import pandas as pd
-from bs4 import BeautifulSoup
-import datetime
-import requests
-import re
-import base64
-import difflib
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from urllib.parse import quote, urlparse
+from urllib.parse import urlparse
 import random
 import concurrent.futures
 # Database module
 import database as db
+# Feed fetching / parsing
+import feeds
+# Background feed ingestion
+import ingest
+# Near-duplicate grouping
+import clustering
+# Keyword / mute-word matching
+import matcher
+# Vectorized recommendation scoring
+import scoring
+# Read tracking (clicks / impressions)
+import read_tracking
+# Persistent og:image cache
+import og_images
+# Local thumbnail proxy
+import thumbnails
+# Per-source latency / circuit breaker
+import source_health
+# Size-bounded LRU / TinyLFU caches for fetch_news and og:image lookups
+import bounded_cache
 
 # --- Persistence & Auth Helpers ---
 def get_remote_ip():
@@ -34,6 +48,10 @@ def get_remote_ip():
 def reset_to_defaults():
     st.session_state.theme = 'Dark'
     st.session_state.bookmarks = []
+    st.session_state.bookmark_links = set()
+    st.session_state.bookmark_owner = None
+    st.session_state.read_links = set()
+    st.session_state.shown_links = set()
     st.session_state.recommendation_keywords = []
     st.session_state.mute_words = []
 
@@ -61,32 +79,23 @@ def set_persistent_login(email, ip):
     st.query_params['s'] = token # URL for bookmarking
     return token
 
-# Initialize DB
-db.init_db()
+# Initialize DB (schema and migrations run once per process, not per rerun)
+db.ensure_db()
+db.start_session_sweeper()
 
 # Page Config
 
 def setup_touch_icon():
     """Injects Apple Touch Icon using SVG emoji for Streamlit Cloud compatibility."""
-    # Create SVG with banana emoji
-    svg_icon = """
-    <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
-        <rect width="100" height="100" fill="#000000" rx="20"/>
-        <text x="50" y="70" font-size="60" text-anchor="middle">🍌</text>
-    </svg>
-    """
-    
-    # Convert SVG to base64
-    import base64
-    b64_svg = base64.b64encode(svg_icon.encode('utf-8')).decode('utf-8')
-    
+    # SVG with banana emoji, served once from static/ instead of a data URI per <link>
+    icon_url = "app/static/touch-icon.svg"
     st.markdown(
         f"""
-        <link rel="apple-touch-icon" sizes="180x180" href="data:image/svg+xml;base64,{b64_svg}">
-        <link rel="apple-touch-icon" sizes="152x152" href="data:image/svg+xml;base64,{b64_svg}">
-        <link rel="apple-touch-icon" sizes="120x120" href="data:image/svg+xml;base64,{b64_svg}">
-        <link rel="apple-touch-icon" href="data:image/svg+xml;base64,{b64_svg}">
-        <link rel="icon" type="image/svg+xml" href="data:image/svg+xml;base64,{b64_svg}">
+        <link rel="apple-touch-icon" sizes="180x180" href="{icon_url}">
+        <link rel="apple-touch-icon" sizes="152x152" href="{icon_url}">
+        <link rel="apple-touch-icon" sizes="120x120" href="{icon_url}">
+        <link rel="apple-touch-icon" href="{icon_url}">
+        <link rel="icon" type="image/svg+xml" href="{icon_url}">
         <meta name="apple-mobile-web-app-capable" content="yes">
         <meta name="apple-mobile-web-app-status-bar-style" content="black-translucent">
         <meta name="apple-mobile-web-app-title" content="AI News Pro">
@@ -98,6 +107,10 @@ def setup_touch_icon():
 st.set_page_config(page_title="AI News Pro", page_icon="🍌", layout="wide")
 setup_touch_icon()
 
+# Static assets (served from static/ via server.enableStaticServing)
+PLACEHOLDER_ICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "placeholder.png")
+PLACEHOLDER_ICON_URL = "app/static/placeholder.png"
+
 ALL_SOURCES = [
     "Bing News", "Yahoo! ニュース", "ライブドアニュース", "NHK ニュース", 
     "Google News", "Gigazine", "ITmedia", "CNET Japan", 
@@ -107,17 +120,116 @@ ALL_SOURCES = [
 # Logic to load user data if logged in
 def load_user_session():
     if st.session_state.user:
-        username = st.session_state.user
-        st.session_state.recommendation_keywords = db.load_user_data(username, 'keywords', [])
-        st.session_state.bookmarks = db.load_user_data(username, 'bookmarks', [])
-        saved_theme = db.load_user_data(username, 'theme', 'Dark')
-        st.session_state.theme = saved_theme
-        st.session_state.mute_words = db.load_user_data(username, 'mute_words', [])
+        profile = db.load_user_profile(st.session_state.user)
+        st.session_state.recommendation_keywords = profile.get('keywords', [])
+        st.session_state.theme = profile.get('theme', 'Dark')
+        st.session_state.mute_words = profile.get('mute_words', [])
+        # Saved links are read once per login; add/remove keep the set current
+        if st.session_state.bookmark_owner != st.session_state.user:
+            st.session_state.bookmark_links = db.get_bookmark_links(st.session_state.user)
+            st.session_state.bookmark_owner = st.session_state.user
+
+# --- Read Tracking ---
+# Logged-in users: events are buffered by read_tracking and flushed to
+# read_history in batches; "already read" checks use its in-memory set.
+# Guests: st.session_state.read_links only.
+def read_links():
+    if st.session_state.user:
+        return read_tracking.get_tracker().read_urls(st.session_state.user)
+    return st.session_state.read_links
+
+def mark_read(link):
+    if st.session_state.user:
+        read_tracking.get_tracker().record_click(st.session_state.user, link)
+    st.session_state.read_links.add(link)
+
+def record_impressions(items):
+    """Count articles as shown once per session (reruns do not add impressions)."""
+    new = [it['link'] for it in items if it['link'] not in st.session_state.shown_links]
+    if not new:
+        return
+    st.session_state.shown_links.update(new)
+    if st.session_state.user:
+        read_tracking.get_tracker().record_impressions(st.session_state.user, new)
+
+# --- Date Filter ---
+# Sidebar label -> how far back articles are shown (seconds, None = everything)
+DATE_FILTERS = {"すべて": None, "1時間以内": 3600, "24時間以内": 24 * 3600, "7日以内": 7 * 24 * 3600}
+
+def date_cutoff():
+    """Oldest published_ts to show, or None (rounded to the minute so cached lookups are reused)."""
+    window = DATE_FILTERS.get(st.session_state.get('date_filter'))
+    if not window:
+        return None
+    return int(time.time() - window) // 60 * 60
+
+def within_date_range(items, since):
+    if not since:
+        return items
+    return [it for it in items if (it.get('published_ts') or 0) >= since]
+
+# --- Bookmarks ---
+# Logged-in users: one row per article in the bookmarks table.
+# Guests: st.session_state.bookmarks (list, save order). Both keep
+# st.session_state.bookmark_links for O(1) "already saved?" checks.
+BOOKMARK_PAGE_SIZE = 60
+
+def add_bookmark(item):
+    """Save an article; returns False if it was already saved."""
+    if item['link'] in st.session_state.bookmark_links:
+        return False
+    if st.session_state.user:
+        db.add_bookmark(st.session_state.user, item)
+    else:
+        st.session_state.bookmarks.append(item)
+    st.session_state.bookmark_links.add(item['link'])
+    return True
+
+def remove_bookmark(link):
+    if st.session_state.user:
+        db.remove_bookmark(st.session_state.user, link)
+    else:
+        st.session_state.bookmarks = [b for b in st.session_state.bookmarks if b['link'] != link]
+    st.session_state.bookmark_links.discard(link)
+
+def toggle_bookmark(item):
+    """Save or un-save; returns True if the article is now saved."""
+    if item['link'] in st.session_state.bookmark_links:
+        remove_bookmark(item['link'])
+        return False
+    return add_bookmark(item)
+
+def load_bookmarks(source=None, cursor=None, limit=BOOKMARK_PAGE_SIZE):
+    """One page of saved articles in save order: (articles, next_cursor)."""
+    if st.session_state.user:
+        return db.get_bookmarks_page(st.session_state.user, source, cursor, limit)
+    items = [b for b in st.session_state.bookmarks if not source or b['source'] == source]
+    start = cursor or 0
+    return items[start:start + limit], (start + limit if start + limit < len(items) else None)
+
+def iter_bookmarks(source=None, pages=None):
+    """Saved articles page by page (all of them, or the first `pages` pages)."""
+    cursor = None
+    page_no = 0
+    while True:
+        page, cursor = load_bookmarks(source, cursor)
+        yield from page
+        page_no += 1
+        if cursor is None or (pages is not None and page_no >= pages):
+            return
 
 if 'theme' not in st.session_state:
     st.session_state.theme = 'Dark'
 if 'bookmarks' not in st.session_state:
     st.session_state.bookmarks = []
+if 'bookmark_links' not in st.session_state:
+    st.session_state.bookmark_links = set()
+if 'bookmark_owner' not in st.session_state:
+    st.session_state.bookmark_owner = None
+if 'read_links' not in st.session_state:
+    st.session_state.read_links = set()
+if 'shown_links' not in st.session_state:
+    st.session_state.shown_links = set()
 if 'recommendation_keywords' not in st.session_state:
     st.session_state.recommendation_keywords = []
 if 'date_filter' not in st.session_state:
@@ -176,38 +288,62 @@ theme_colors = {
 }
 c = theme_colors[st.session_state.theme]
 
+# --- Bounded Caches ---
+# Process-wide, size- and byte-limited (see bounded_cache.py); headline feeds
+# and ad-hoc searches get separate budgets so one-off queries cannot evict feeds
+FEED_CACHE_MB = int(os.environ.get("AINEWS_FEED_CACHE_MB", 32))
+SEARCH_CACHE_MB = int(os.environ.get("AINEWS_SEARCH_CACHE_MB", 16))
+OG_CACHE_MB = int(os.environ.get("AINEWS_OG_CACHE_MB", 4))
+FEED_CACHE = bounded_cache.get_cache("feeds", max_entries=128, max_bytes=FEED_CACHE_MB * 1024 * 1024, ttl=60)
+SEARCH_CACHE = bounded_cache.get_cache("search", max_entries=256, max_bytes=SEARCH_CACHE_MB * 1024 * 1024, ttl=300)
+OG_CACHE = bounded_cache.get_cache("og_images", max_entries=20000, max_bytes=OG_CACHE_MB * 1024 * 1024, ttl=3600,
+                                   sizeof=lambda url: len(url or "") + 64)
+
 # --- Helper Functions ---
-def clean_html(raw_html):
-    if not raw_html: return ""
-    cleanr = re.compile('<.*?>')
-    cleantext = re.sub(cleanr, '', raw_html)
-    cleantext = ' '.join(cleantext.split())
-    return cleantext
-
-def parse_summary(html_content):
-    if not html_content: return "", ""
-    soup = BeautifulSoup(html_content, "html.parser")
-    img_tag = soup.find('img')
-    img_src = img_tag['src'] if img_tag else ""
-    text = clean_html(html_content)
-    return text, img_src
-
-def get_high_res_image_url(url):
-    if not url: return ""
-    if "bing.com/th" in url: return f"{url}&w=800&h=450&c=7&rs=1"
-    return url
-
-@st.cache_data(ttl=3600)
 def fetch_og_image(url):
-    if not url or url == "#": return ""
+    image = OG_CACHE.get(url)
+    if image is None:
+        image = og_images.resolve(url)
+        if image:  # misses and failed fetches are remembered (or retried) by og_images
+            OG_CACHE.put(url, image)
+    return image
+
+def load_all_images(items):
+    """Resolve og:image for every item without one, in parallel (🖼️ 全画像を読み込む)."""
+    missing = [it for it in items if not it['img_src'] and f"ic_{it['id']}" not in st.session_state]
+    images = og_images.resolve_many([it['link'] for it in missing])
+    for it in missing:
+        st.session_state[f"ic_{it['id']}"] = images.get(it['link'], "")
+        if images.get(it['link']):
+            OG_CACHE.put(it['link'], images[it['link']])
+
+def thumbnail_map(images):
+    """Local thumbnail URL for each remote image that has one (the rest are queued)."""
     try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        og = soup.find('meta', property='og:image')
-        if og: return og.get('content')
-    except: pass
-    return ""
+        return thumbnails.local_urls(images)
+    except Exception:
+        return {}
+
+def apply_cached_images(items):
+    """Fill in images other sessions already resolved (one cache query, no network)."""
+    missing = [it for it in items if not it['img_src'] and f"ic_{it['id']}" not in st.session_state]
+    if not missing:
+        return
+    try:
+        images = og_images.cached([it['link'] for it in missing])
+    except Exception:
+        return
+    for it in missing:
+        if it['link'] in images:
+            st.session_state[f"ic_{it['id']}"] = images[it['link']]
+
+def text_html(text):
+    """Title / summary plain text for an HTML card (see feeds.parse_feed).
+
+    Only < and > are escaped: no markup gets through, and entities left in
+    articles archived before they were decoded still render.
+    """
+    return text.replace('<', '&lt;').replace('>', '&gt;')
 
 def send_auth_email(target_email, subject, body):
     """Send an authentication email using Sakura Server SMTP."""
@@ -359,45 +495,11 @@ with st.sidebar:
         key="news_source_select"
     )
 
-    cats = {}
     if source == "⚡ 総合トップ":
         cats = {"最新トレンド": "HEADLINES"}
-    elif source == "Yahoo! ニュース":
-        cats = {
-            "主要": "HEADLINES", "IT・科学": "TECHNOLOGY", "経済": "BUSINESS", "国際": "International", 
-            "エンタメ": "Entertainment", "スポーツ": "Sports", "国内": "Domestic", "ライフ": "Life", 
-            "地域": "Local"
-        }
-    elif source == "NHK ニュース":
-        cats = {
-            "主要": "HEADLINES", "社会": "Social", "政治": "Politics", "国際": "International", 
-            "経済": "Economy", "科学・文化": "Science", "スポーツ": "Sports", "地域": "Local"
-        }
-    elif source == "Google News":
-        cats = {
-            "トップ": "HEADLINES", "テクノロジー": "TECHNOLOGY", "ビジネス": "BUSINESS", "国際": "International", 
-            "エンタメ": "Entertainment", "スポーツ": "Sports", "科学": "Science", "健康": "Health"
-        }
-    elif source == "ITmedia":
-        cats = {
-            "総合": "ALL", "モバイル": "MOBILE", "エンタープライズ": "ENTERPRISE", 
-            "PC USER": "PCUSER", "ビジネスオンライン": "BUSINESS"
-        }
-    elif source in ["Qiita", "Zenn"]:
-        cats = {"トレンド": "HEADLINES"}
-    elif source == "ナタリー":
-        cats = {
-            "音楽": "MUSIC", "映画": "MOVIE", "お笑い": "COMEDY", "コミック": "COMIC"
-        }
-    elif source in ["CNET Japan", "TechCrunch Japan", "Gigazine", "ライブドアニュース"]:
-        cats = {"トップ": "HEADLINES"}
-    elif source == "Bing News":
-        cats = {
-            "トップ": "HEADLINES", "ビジネス": "Business", "テクノロジー": "Technology", 
-            "エンタメ": "Entertainment", "政治": "Politics", "科学": "Science", 
-            "健康": "Health", "スポーツ": "Sports", "国際": "World", "国内": "Japan"
-        }
-        
+    else:
+        cats = feeds.SOURCE_CATEGORIES[source]
+
     cat_label = st.selectbox("カテゴリー", list(cats.keys()), key=f"cat_select_{source}")
     cat_code = cats[cat_label]
 
@@ -419,8 +521,39 @@ with st.sidebar:
         elif new_kw in st.session_state.recommendation_keywords:
             st.warning("そのキーワードは既に登録されています")
     
+    st.checkbox("既読の記事を隠す", key="hide_read")
+    st.selectbox("期間", list(DATE_FILTERS), key="date_filter")
+
     # Debug Options
     debug_mode = st.checkbox("🛠️ デバッグモード", key="debug_mode", help="おすすめ記事の取得状況を表示します")
+    if debug_mode:
+        rs = feeds.revalidation_stats
+        st.caption(f"フィード再検証: {rs['not_modified']}/{rs['requests']} 件が 304 ・ 節約 {rs['bytes_saved'] / 1024:.1f} KB")
+        ff = feeds.fastfeed.stats
+        st.caption(f"フィード解析: 高速パス {ff['fast']} 件 ・ feedparser {ff['fallback']} 件")
+        ingest_status = ingest.get_scheduler().status
+        ingest_errors = sum(1 for v in ingest_status.values() if v['error'])
+        st.caption(f"バックグラウンド取得: {len(ingest_status)} フィード ・ エラー {ingest_errors} 件")
+        fs = feeds.flights.stats
+        st.caption(f"同時取得の合流: {fs['shared']}/{fs['calls']} 件 ({feeds.flights.coalescing_ratio():.0%})")
+        rt = read_tracking.get_tracker().stats
+        st.caption(f"既読記録: {rt['events']} 件 ・ 書き込み {rt['flushed']} 行 / {rt['flushes']} 回")
+        ts = thumbnails.stats
+        st.caption(f"サムネイル: 配信 {ts['hits']} ・ 生成 {ts['created']} ・ 失敗 {ts['failed']} ・ 削除 {ts['evicted']}")
+        health = source_health.snapshot()
+        tripped = [h for h in health if h['state'] != source_health.CLOSED]
+        st.caption(f"ソース状態: {len(health) - len(tripped)} 正常 ・ 遮断 {len(tripped)} ・ スキップ {rs['short_circuited']} 回")
+        for h in health:
+            if h['state'] == source_health.CLOSED and not h['failures']:
+                continue
+            p95 = f"{h['p95'] * 1000:.0f} ms" if h['p95'] is not None else "-"
+            reason = h['last_failure']['reason'] if h['last_failure'] else "-"
+            st.caption(f"・{h['source']}: {h['state']} ・ p95 {p95} ・ タイムアウト {h['timeout']:.1f} 秒 ・ "
+                       f"エラー率 {h['error_rate']:.0%} ・ 直近の失敗 {reason}")
+        for cs in bounded_cache.snapshot():
+            st.caption(f"キャッシュ {cs['name']}: {cs['entries']}/{cs['max_entries']} 件 ・ "
+                       f"{cs['bytes'] / 2**20:.1f}/{cs['max_bytes'] / 2**20:.0f} MB ・ ヒット率 {cs['hit_ratio']:.0%} ・ "
+                       f"追い出し {cs['evictions']} ・ 不採用 {cs['rejected']} ・ 期限切れ {cs['expired']}")
 
     new_keyword = st.text_input(
         "興味のあるキーワードを追加（Enterで追加）", 
@@ -444,9 +577,13 @@ with st.sidebar:
                         db.save_user_data(st.session_state.user, 'keywords', st.session_state.recommendation_keywords)
                     st.rerun()
 
-@st.cache_data(ttl=299)
 def fetch_news(source, category_code, query_text):
-    """Fetch and parse news from RSS feeds."""
+    """Fetch and parse news from RSS feeds (cached; searches and headlines have separate budgets)."""
+    cache = SEARCH_CACHE if query_text or category_code == "SEARCH" else FEED_CACHE
+    # Cached lists are shared between sessions: hand out a copy
+    return list(cache.get_or_load((source, category_code, query_text), _fetch_news, source, category_code, query_text))
+
+def _fetch_news(source, category_code, query_text):
     
     # Debug info (only visible if debug_mode is active in session)
     is_debug = st.session_state.get('debug_mode', False)
@@ -494,173 +631,55 @@ def fetch_news(source, category_code, query_text):
                     continue
         
         # Sort by published date (newest first)
-        all_items.sort(key=lambda x: x['published'], reverse=True)
+        all_items.sort(key=lambda x: x.get('published_ts') or 0, reverse=True)
         
         # Return balanced mix (60 articles = 12 sources × 5 each)
         return all_items[:60]
 
     # --- Standard Source Logic ---
-    url = ""
-    if source == "Yahoo! ニュース":
-        # Using /categories/ for most to get 50 articles and fix "Life"
-        mapping = {
-            "HEADLINES": "topics/top-picks.xml",
-            "TECHNOLOGY": "categories/it.xml",
-            "BUSINESS": "categories/business.xml",
-            "International": "categories/world.xml",
-            "Entertainment": "categories/entertainment.xml",
-            "Sports": "categories/sports.xml",
-            "Science": "topics/science.xml", # No category for science
-            "Local": "categories/local.xml",
-            "Domestic": "categories/domestic.xml",
-            "Life": "categories/life.xml"
-        }
-        url = f"https://news.yahoo.co.jp/rss/{mapping.get(category_code, 'topics/top-picks.xml')}"
-    elif source == "NHK ニュース":
-        mapping = {
-            "HEADLINES": "cat0.xml", "Social": "cat1.xml", "Politics": "cat4.xml",
-            "International": "cat6.xml", "Economy": "cat5.xml", "Science": "cat3.xml", "Sports": "cat2.xml",
-            "Local": "cat9.xml"
-        }
-        url = f"https://www.nhk.or.jp/rss/news/{mapping.get(category_code, 'cat0.xml')}"
-    elif source == "Bing News":
-        # Map category codes to Japanese search terms
-        bing_map = {
-            "HEADLINES": "トップニュース", "Business": "経済", "Technology": "テクノロジー",
-            "Entertainment": "工ンタメ", "Politics": "政治", "Science": "科学",
-            "Health": "健康", "Sports": "スポーツ", "World": "国際", "Japan": "国内トップ"
-        }
-        # Use query_text if provided (global search), otherwise use category mapping
-        q = query_text if query_text else bing_map.get(category_code, "トップニュース")
-        url = f"https://www.bing.com/news/search?q={quote(q)}&format=rss&cc=JP&setLang=ja-JP"
-    elif source == "Google News":
-        # Mapping standard labels to working Google News Topic IDs
-        g_map = {
-            "HEADLINES": "", 
-            "TECHNOLOGY": "TECHNOLOGY",
-            "BUSINESS": "BUSINESS",
-            "International": "WORLD",
-            "Entertainment": "ENTERTAINMENT",
-            "Sports": "SPORTS",
-            "Science": "SCIENCE",
-            "Health": "HEALTH"
-        }
-        params = "hl=ja&gl=JP&ceid=JP:ja"
-        if category_code == "SEARCH": 
-            url = f"https://news.google.com/rss/search?q={quote(query_text)}&{params}"
-        elif category_code == "HEADLINES": 
-            url = f"https://news.google.com/rss?{params}"
-        else: 
-            # Use the more stable /headlines/section/topic/ format
-            topic_id = g_map.get(category_code, "")
-            if topic_id:
-                url = f"https://news.google.com/rss/headlines/section/topic/{topic_id}?{params}"
-            else:
-                url = f"https://news.google.com/rss?{params}"
-    elif source == "Qiita":
-        url = f"https://qiita.com/tags/{quote(query_text) if category_code == 'SEARCH' else 'Python'}/feed"
-    elif source == "Zenn":
-        url = f"https://zenn.dev/topics/{quote(query_text.lower()) if category_code == 'SEARCH' else 'tech'}/feed"
-    elif source == "ITmedia":
-        it_map = {
-            "ALL": "itmedia_all.xml", "MOBILE": "mobile.xml", "ENTERPRISE": "enterprise.xml",
-            "PCUSER": "pcuser.xml", "BUSINESS": "business.xml"
-        }
-        url = f"https://rss.itmedia.co.jp/rss/2.0/{it_map.get(category_code, 'itmedia_all.xml')}"
-    elif source == "ナタリー":
-        natalie_map = {
-            "MUSIC": "music", "MOVIE": "eiga", "COMEDY": "owarai", "COMIC": "comic"
-        }
-        category = natalie_map.get(category_code, "music")
-        url = f"https://natalie.mu/{category}/feed/news"
-    elif source == "CNET Japan":
-        url = "https://japan.cnet.com/rss/index.rdf"
-    elif source == "TechCrunch Japan":
-        url = "https://techcrunch.com/tag/japan/feed/"
-    elif source == "Gigazine":
-        url = "https://gigazine.net/news/rss_2.0/"
-    elif source == "ライブドアニュース":
-        url = "https://news.livedoor.com/topics/rss/top.xml"
-
-    if not url: return []
+    if query_text or category_code == "SEARCH":
+        # Ad-hoc searches are not scheduled, fetch them live
+        url = feeds.resolve_feed_url(source, category_code, query_text)
+        if not url: return []
+        try:
+            # Conditional GET through the shared pool; 304 reuses the stored articles
+            return feeds.fetch_feed(url, source)
+        except Exception:
+            # Reason is recorded in source_health (shown in debug mode)
+            return []
+
+    # Headline feeds are polled by the background ingestion scheduler
     try:
-        # Use requests with User-Agent to avoid 403 Forbidden from some sites (Qiita, Zenn, etc.)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        feed = feedparser.parse(response.content)
-        
-        processed = []
-        for entry in feed.entries:
-            title = entry.get('title', 'No Title')
-            link = entry.get('link', '#')
-            raw_sum = entry.get('summary', '') or entry.get('description', '') or entry.get('content', [{'value': ''}])[0].get('value', '')
-            img = entry.get('news_image', '') or entry.get('media_thumbnail', [{'url':''}])[0].get('url','')
-            if not img:
-                 for enc in entry.get('enclosures', []):
-                    if 'image' in enc.get('type', '') or any(ext in enc.get('href', '').lower() for ext in ['.jpg','.jpeg','.png','.webp']):
-                        img = enc.get('href', '')
-                        break
-            summary_text, html_img = parse_summary(raw_sum)
-            if not img: img = html_img
-            # Parse date for reliable sorting
-            pub_date_raw = entry.get('published', '')
-            pub_date_formatted = pub_date_raw[:16] # Fallback
-            if 'published_parsed' in entry and entry.published_parsed:
-                try:
-                    dt = datetime(*entry.published_parsed[:6])
-                    pub_date_formatted = dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    pass
-
-            processed.append({
-                'title': title, 'link': link, 'summary': summary_text, 
-                'img_src': get_high_res_image_url(img), 'source': source, 
-                'id': link, 'published': pub_date_formatted
-            })
-        return processed
-    except: return []
-
-def calculate_article_score(article, keywords):
-    """Calculate relevance score for an article based on keywords and freshness."""
-    if not keywords:
-        return 0
-    
-    score = 0
-    title_lower = article['title'].lower()
-    summary_lower = article['summary'].lower()
-    
-    # Keyword matching (max 50 points)
-    keyword_matched = False
-    for keyword in keywords:
-        kw_lower = keyword.lower()
-        if kw_lower in title_lower:
-            score += 30
-            keyword_matched = True
-        elif kw_lower in summary_lower:
-            score += 20
-            keyword_matched = True
-    
-    # Only add freshness bonus if at least one keyword matched
-    if keyword_matched:
-        score += 15  # Freshness bonus for relevant articles
-    
-    return score
+        return ingest.get_scheduler().read(source, category_code)
+    except Exception as e:
+        # e.g. sqlite busy / locked reading the feed cache
+        if is_debug: print(f"Error reading ingested feed {source}: {e}")
+        return []
+
+RECOMMEND_ARCHIVE_SIZE = 5000  # newest archived articles ranked alongside the live fetch
 
-def get_recommended_articles(keywords):
+@st.cache_data(ttl=60)
+def load_recent_archive(limit=RECOMMEND_ARCHIVE_SIZE, since=None):
+    """Newest articles from the local archive (candidates for recommendations)."""
+    try:
+        articles, _ = db.get_articles_page(limit=limit, since=since)
+        return articles
+    except Exception:
+        return []
+
+def get_recommended_articles(keywords, mute_words=None, source=None, limit=None, since=None):
     """
     Fetch articles by actively searching for each keyword in ALL available sources.
     This ensures maximum recall even if it takes a bit longer.
+    Only articles published at or after `since` (epoch) are ranked, if given.
+    Returns (top `limit` (score, item) pairs, total number of matching articles).
     """
     if not keywords:
-        return []
+        return [], 0
     
     # Debug info
     is_debug = st.session_state.get('debug_mode', False)
     
-    all_articles = []
     seen_links = set()
     
     # Sources that rely on active searching
@@ -677,44 +696,69 @@ def get_recommended_articles(keywords):
         
         # 1. Search Driven Sources (High Precision)
         for kw in keywords:
-            for source in search_driven_sources:
-                futures.append(executor.submit(fetch_news, source, "SEARCH", kw))
+            for src in search_driven_sources:
+                futures.append(executor.submit(fetch_news, src, "SEARCH", kw))
 
         # 2. Feed Driven Sources (Filter recent items)
         # For feeds, we just fetch once per source, then filter by all keywords locally
-        for source in feed_driven_sources:
+        for src in feed_driven_sources:
             cat_code = "HEADLINES"
-            if source == "ITmedia": cat_code = "ALL"
-            elif source == "ナタリー": cat_code = "MUSIC"
-            futures.append(executor.submit(fetch_news, source, cat_code, ""))
+            if src == "ITmedia": cat_code = "ALL"
+            elif src == "ナタリー": cat_code = "MUSIC"
+            futures.append(executor.submit(fetch_news, src, cat_code, ""))
             
+        candidates = []
         for future in concurrent.futures.as_completed(futures):
             try:
                 items = future.result()
                 for item in items:
                     if item['link'] not in seen_links:
-                        # Score calculation is fast, do it here
-                        score = calculate_article_score(item, keywords)
-                        if score > 0:
-                            all_articles.append((score, item))
-                            seen_links.add(item['link'])
+                        candidates.append(item)
+                        seen_links.add(item['link'])
             except Exception as e:
                 if is_debug: print(f"Error in recommendation fetch: {e}")
                 continue
-                
-    # Sort by score (descending)
-    all_articles.sort(reverse=True, key=lambda x: x[0])
+    
+    # 3. Archived articles (already ingested, no network)
+    for item in load_recent_archive(since=since):
+        if item['link'] not in seen_links:
+            candidates.append(item)
+            seen_links.add(item['link'])
+    candidates = within_date_range(candidates, since)
+    
+    # Vectorized scoring (keyword hit matrix + time decay), top-K via argpartition
+    ranked, total = scoring.rank_articles(candidates, keywords, mute_words or (), k=limit, source=source)
     
     if is_debug:
-        st.write(f"Total articles found: {len(all_articles)}")
+        st.write(f"Total articles found: {total}")
     
-    # Return ALL items (filtering happens in UI)
-    return all_articles
+    return ranked, total
 
-def get_search_results(query):
-    """Search for a keyword across multiple sources."""
+LOCAL_SEARCH_MIN_RESULTS = 20  # below this, enrich with a live upstream search
+
+def get_search_results(query, since=None):
+    """Search the local archive index first, then live sources in parallel if it has too few hits.
+
+    since (epoch) limits results to articles published at or after it.
+    """
     if not query: return []
     
+    results = []
+    seen_links = set()
+    
+    # 1. Local full-text index (BM25 ranked, no network)
+    try:
+        for article in db.search_articles(query, limit=100, since=since):
+            if article['link'] not in seen_links:
+                results.append(article)
+                seen_links.add(article['link'])
+    except Exception as e:
+        if st.session_state.get('debug_mode', False): print(f"Local search failed: {e}")
+    
+    if len(results) >= LOCAL_SEARCH_MIN_RESULTS:
+        return results
+    
+    # 2. Live search fallback, all sources at once
     search_sources = [
         ("Bing News", "SEARCH"),
         ("Google News", "SEARCH"),
@@ -722,74 +766,56 @@ def get_search_results(query):
         ("Zenn", "SEARCH")
     ]
     
-    results = []
-    seen_links = set()
-    
-    for source, cat_code in search_sources:
-        try:
-            articles = fetch_news(source, cat_code, query)
+    live = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(search_sources)) as executor:
+        futures = [executor.submit(fetch_news, source, cat_code, query) for source, cat_code in search_sources]
+        for future in futures:
+            try:
+                articles = future.result()
+            except:
+                continue
             for article in articles:
                 if article['link'] not in seen_links:
-                    results.append(article)
+                    live.append(article)
                     seen_links.add(article['link'])
-        except:
-            continue
+    
+    # Archive live hits so the next search for this term is answered locally
+    if live:
+        db.upsert_articles(live, "SEARCH")
             
-    return results
+    return results + within_date_range(live, since)
 
 # --- Content Optimization Logic ---
-def is_similar(a, b, threshold=0.6):
-    """Check if two titles are similar using SequenceMatcher."""
-    return difflib.SequenceMatcher(None, a, b).ratio() > threshold
+def group_articles(articles, threshold=0.6):
+    """Group similar articles together.
 
-def group_articles(articles):
-    """Group similar articles together."""
-    groups = []
+    Archived articles use the story clusters assigned at ingest time; the rest
+    go through MinHash/LSH + a SequenceMatcher check (see clustering.py).
+    """
     # articles must be sorted by date or score before grouping for best results
     # We assume they are already sorted.
-    
-    processed_indices = set()
-    
-    for i, article in enumerate(articles):
-        if i in processed_indices:
-            continue
-            
-        # Start a new group
-        current_group = [article]
-        processed_indices.add(i)
-        
-        # Look ahead for similar articles
-        for j in range(i + 1, len(articles)):
-            if j in processed_indices:
-                continue
-            
-            other = articles[j]
-            # Check similarity
-            if is_similar(article['title'], other['title']):
-                current_group.append(other)
-                processed_indices.add(j)
-        
-        groups.append(current_group)
-            
-    return groups
+    try:
+        cluster_ids = db.get_article_clusters([a['link'] for a in articles])
+    except Exception:
+        cluster_ids = {}
+    return clustering.group_by_cluster(articles, cluster_ids, threshold)
 
 def filter_muted_articles(articles, mute_words):
     """Filter out articles containing mute words."""
     if not mute_words:
         return articles
     
-    filtered = []
-    for item in articles:
-        # Check title and summary
-        text_to_check = (item['title'] + " " + item['summary']).lower()
-        if not any(mw.lower() in text_to_check for mw in mute_words):
-            filtered.append(item)
-            
-    return filtered
+    # Title and summary are checked in one batch scan (see matcher.py)
+    _, muted = matcher.get_matcher((), mute_words).match_batch(articles)
+    return [item for item, is_muted in zip(articles, muted) if not is_muted]
 
 
 # --- Design ---
-st.markdown(f"""
+@st.cache_data
+def theme_css(theme):
+    """The themed <style> block, built once per theme."""
+    c = theme_colors[theme]
+    return f"""
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
     
@@ -935,6 +961,7 @@ st.markdown(f"""
         transition: opacity 0.2s ease;
     }}
     .news-title-link:hover {{ opacity: 0.7; }}
+    .news-title.read {{ opacity: 0.45; }}
     
     .news-title {{
         font-size: 1.35rem; font-weight: 700; line-height: 1.4; margin-bottom: 12px; color: {c['text']};
@@ -1020,7 +1047,9 @@ st.markdown(f"""
         box-shadow: 0 6px 20px rgba(0,0,0,0.4);
     }}
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(theme_css(st.session_state.theme), unsafe_allow_html=True)
 
 # --- Login / Main Logic Switch ---
 
@@ -1116,11 +1145,7 @@ with tab1:
             if st.button("更新", use_container_width=True): st.rerun()
         with c2:
             if st.button("🖼️ 全画像を読み込む", use_container_width=True):
-                items = fetch_news(source, cat_code, "")
-                for it in items:
-                    ik = f"ic_{it['id']}"
-                    if not it['img_src'] and ik not in st.session_state:
-                        st.session_state[ik] = fetch_og_image(it['link'])
+                load_all_images(fetch_news(source, cat_code, ""))
                 st.rerun()
 
         with st.spinner("取得中..."):
@@ -1129,17 +1154,24 @@ with tab1:
         if not news_items:
              st.info("ニュースが見つかりませんでした。")
         else:
-             # 1. Filter Mute Words
+             # 1. Filter Mute Words (and read articles, if hidden / outside the date range)
              filtered_items = filter_muted_articles(news_items, st.session_state.mute_words)
+             filtered_items = within_date_range(filtered_items, date_cutoff())
+             already_read = read_links()
+             if st.session_state.get('hide_read'):
+                 filtered_items = [it for it in filtered_items if it['link'] not in already_read]
              
              if not filtered_items:
-                 st.info("すべての記事がミュートされました。")
+                 st.info("指定した期間の記事はありません。" if date_cutoff() else "すべての記事がミュートされました。")
              else:
                  # 2. Smart Grouping
                  grouped_items = group_articles(filtered_items)
+                 record_impressions([g[0] for g in grouped_items])
+                 apply_cached_images([g[0] for g in grouped_items])
                  
                  st.markdown(f"**表示中: {len(filtered_items)} 件 (グルーピング済)**")
                  
+                 thumbs = thumbnail_map([g[0]['img_src'] or st.session_state.get(f"ic_{g[0]['id']}") for g in grouped_items])
                  cols = st.columns(3)
                  for i, group in enumerate(grouped_items):
                      # Show the first article as main
@@ -1152,13 +1184,14 @@ with tab1:
                          img = main_item['img_src'] or st.session_state.get(ik)
                          
                          st.markdown(f'<div class="news-meta">{main_item["source"]} • {main_item["published"]}</div>', unsafe_allow_html=True)
-                         if img: st.markdown(f'<a href="{main_item["link"]}" target="_blank"><img src="{img}" class="news-thumb"></a>', unsafe_allow_html=True)
-                         st.markdown(f'<a href="{main_item["link"]}" target="_blank" class="news-title-link"><div class="news-title">{main_item["title"]}</div></a>', unsafe_allow_html=True)
+                         if img: st.markdown(f'<a href="{main_item["link"]}" target="_blank"><img src="{thumbs.get(img, img)}" class="news-thumb"></a>', unsafe_allow_html=True)
+                         read_class = " read" if main_item['link'] in already_read else ""
+                         st.markdown(f'<a href="{main_item["link"]}" target="_blank" class="news-title-link"><div class="news-title{read_class}">{text_html(main_item["title"])}</div></a>', unsafe_allow_html=True)
                          
                          if main_item['summary']:
-                             st.markdown(f'<div class="news-excerpt">{main_item["summary"]}</div>', unsafe_allow_html=True)
+                             st.markdown(f'<div class="news-excerpt">{text_html(main_item["summary"])}</div>', unsafe_allow_html=True)
                          
-                         b1, b2 = st.columns(2)
+                         b1, b2, b3 = st.columns(3)
                          with b1:
                               if not img:
                                  if st.button("🖼️ 画像", key=f"img_{i}", use_container_width=True):
@@ -1166,16 +1199,14 @@ with tab1:
                                      st.rerun()
                          with b2:
                              if st.button("保存 🔖", key=f"sav_{i}", use_container_width=True):
-                                 existing = [b for b in st.session_state.bookmarks if b['link'] == main_item['link']]
-                                 if existing:
-                                     st.session_state.bookmarks = [b for b in st.session_state.bookmarks if b['link'] != main_item['link']]
-                                     st.toast("保存を解除しました")
-                                 else:
-                                     st.session_state.bookmarks.append(main_item)
+                                 if toggle_bookmark(main_item):
                                      st.toast("保存しました")
-                                 # Save Bookmark to DB
-                                 if st.session_state.user:
-                                     db.save_user_data(st.session_state.user, 'bookmarks', st.session_state.bookmarks)
+                                 else:
+                                     st.toast("保存を解除しました")
+                                 st.rerun()
+                         with b3:
+                             if not read_class and st.button("既読 ✓", key=f"read_{i}", use_container_width=True):
+                                 mark_read(main_item['link'])
                                  st.rerun()
                          
                          # Show Related Articles if any
@@ -1214,45 +1245,29 @@ with tab2:
         st.markdown(f"**登録キーワード:** {', '.join(st.session_state.recommendation_keywords)}")
         
         with st.spinner("全ソースからおすすめ記事を取得中..."):
-            scored_items = get_recommended_articles(st.session_state.recommendation_keywords)
-            
-            # Filter by source if not 総合トップ
-            if source != "⚡ 総合トップ" and scored_items:
-                scored_items = [(score, item) for score, item in scored_items if item['source'] == source]
-            
-            # Filter Mute Words
-            if scored_items and st.session_state.mute_words:
-                filtered_scored = []
-                for score, item in scored_items:
-                    text_check = (item['title'] + " " + item['summary']).lower()
-                    if not any(mw.lower() in text_check for mw in st.session_state.mute_words):
-                        filtered_scored.append((score, item))
-                scored_items = filtered_scored
+            # Mute words and the source filter (if not 総合トップ) are applied while ranking
+            display_items, total_matched = get_recommended_articles(
+                st.session_state.recommendation_keywords,
+                st.session_state.mute_words,
+                source=None if source == "⚡ 総合トップ" else source,
+                limit=50,
+                since=date_cutoff()
+            )
         
-        if scored_items:
-            # Default is already score order (from get_recommended_articles)
-            
-            # Limit display to top 50 AFTER filtering
-            display_items = scored_items[:50]
-            
-            st.caption(f"全 {len(scored_items)} 件中 {len(display_items)} 件を表示しています")
+        if display_items:
+            # Already in score order, top 50 AFTER filtering
+            st.caption(f"全 {total_matched} 件中 {len(display_items)} 件を表示しています")
 
             # Bulk image load button
             if st.button("🖼️ 全画像を読み込む", key="rec_load_all_images", use_container_width=True):
-                for score, item in display_items:
-                    ik = f"ic_{item['id']}"
-                    if not item['img_src'] and ik not in st.session_state:
-                         st.session_state[ik] = fetch_og_image(item['link'])
+                load_all_images([item for _, item in display_items])
                 st.rerun()
+            apply_cached_images([item for _, item in display_items])
             
-            # Load app icon for placeholder
-            try:
-                with open("app_icon.png", "rb") as f:
-                    icon_b64 = base64.b64encode(f.read()).decode()
-                placeholder_img = f"data:image/png;base64,{icon_b64}"
-            except:
-                placeholder_img = None
+            # Placeholder icon: one static file the browser caches, not a data URI per card
+            placeholder_img = PLACEHOLDER_ICON_URL if os.path.exists(PLACEHOLDER_ICON_PATH) else None
 
+            thumbs = thumbnail_map([it['img_src'] or st.session_state.get(f"ic_{it['id']}") for _, it in display_items])
             cols = st.columns(3)
             for i, (score, item) in enumerate(display_items):
                 with cols[i % 3]:
@@ -1261,7 +1276,7 @@ with tab2:
                     img = item['img_src'] or st.session_state.get(ik)
                     
                     if img:
-                        st.markdown(f'<a href="{item["link"]}" target="_blank"><img src="{img}" class="news-thumb"></a>', unsafe_allow_html=True)
+                        st.markdown(f'<a href="{item["link"]}" target="_blank"><img src="{thumbs.get(img, img)}" class="news-thumb"></a>', unsafe_allow_html=True)
                     elif placeholder_img:
                         st.markdown(f'<a href="{item["link"]}" target="_blank"><img src="{placeholder_img}" class="news-thumb" style="object-fit: contain; padding: 10px; background: #222;"></a>', unsafe_allow_html=True)
                     else:
@@ -1273,19 +1288,15 @@ with tab2:
                             <div class="news-meta">{item['source']} • {item['published'][:10]}
                             <span class="score-badge">🏆 {score}点</span></div>
                             <a href="{item["link"]}" target="_blank" style="text-decoration:none;color:inherit;">
-                                <div class="news-title">{item['title']}</div>
+                                <div class="news-title">{text_html(item['title'])}</div>
                             </a>
-                            <div class="news-excerpt">{item['summary'][:60]}...</div>
+                            <div class="news-excerpt">{text_html(item['summary'][:60])}...</div>
                         </div>
                     ''', unsafe_allow_html=True)
                     
                     if st.button("保存 🔖", key=f"rec_sav_{i}", use_container_width=True):
-                        if not any(b['link'] == item['link'] for b in st.session_state.bookmarks):
-                            st.session_state.bookmarks.append(item)
+                        if add_bookmark(item):
                             st.toast("保存しました")
-                            # Save to DB
-                            if st.session_state.user:
-                                db.save_user_data(st.session_state.user, 'bookmarks', st.session_state.bookmarks)
                         else:
                             st.toast("既に保存されています")
                     
@@ -1295,9 +1306,9 @@ with tab2:
 
 with tab3:
     # Filter bookmarks by source if not 総合トップ
-    display_bookmarks = st.session_state.bookmarks
-    if source != "⚡ 総合トップ":
-        display_bookmarks = [b for b in st.session_state.bookmarks if b['source'] == source]
+    bookmark_source = None if source == "⚡ 総合トップ" else source
+    bookmark_pages = st.session_state.get('bookmark_pages', 1)
+    display_bookmarks = list(iter_bookmarks(bookmark_source, pages=bookmark_pages))
     
     if not display_bookmarks:
         if source == "⚡ 総合トップ":
@@ -1313,7 +1324,7 @@ with tab3:
                 'ソース': b['source'],
                 '日付': b['published'],
                 '要約': b['summary']
-            } for b in display_bookmarks])
+            } for b in iter_bookmarks(bookmark_source)])
             
             csv = df.to_csv(index=False, encoding='utf-8-sig')
             st.download_button(
@@ -1326,6 +1337,7 @@ with tab3:
         
         st.divider()
         
+        thumbs = thumbnail_map([b.get('img_src') or st.session_state.get(f"ic_{b['id']}") for b in display_bookmarks])
         cols_b = st.columns(3)
         for i, item in enumerate(display_bookmarks):
             with cols_b[i % 3]:
@@ -1334,22 +1346,23 @@ with tab3:
                 img = item.get('img_src') or st.session_state.get(ik)
                 
                 st.markdown(f'<div class="news-meta">{item["source"]} • {item["published"]}</div>', unsafe_allow_html=True)
-                if img: st.markdown(f'<a href="{item["link"]}" target="_blank"><img src="{img}" class="news-thumb"></a>', unsafe_allow_html=True)
-                st.markdown(f'<a href="{item["link"]}" target="_blank" class="news-title-link"><div class="news-title">{item["title"]}</div></a>', unsafe_allow_html=True)
+                if img: st.markdown(f'<a href="{item["link"]}" target="_blank"><img src="{thumbs.get(img, img)}" class="news-thumb"></a>', unsafe_allow_html=True)
+                st.markdown(f'<a href="{item["link"]}" target="_blank" class="news-title-link"><div class="news-title">{text_html(item["title"])}</div></a>', unsafe_allow_html=True)
                 
                 if item['summary']:
-                    st.markdown(f'<div class="news-excerpt">{item["summary"]}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="news-excerpt">{text_html(item["summary"])}</div>', unsafe_allow_html=True)
                 
                 if st.button("削除 🗑️", key=f"del_{i}", use_container_width=True):
-                    # Find and remove from original bookmarks list
-                    st.session_state.bookmarks = [b for b in st.session_state.bookmarks if b['link'] != item['link']]
-                    # Save to DB
-                    if st.session_state.user:
-                        db.save_user_data(st.session_state.user, 'bookmarks', st.session_state.bookmarks)
+                    remove_bookmark(item['link'])
                     st.rerun()
                 
                 st.markdown('</div>', unsafe_allow_html=True)
 
+        if len(display_bookmarks) == bookmark_pages * BOOKMARK_PAGE_SIZE:
+            if st.button("さらに表示", key="more_bookmarks", use_container_width=True):
+                st.session_state.bookmark_pages = bookmark_pages + 1
+                st.rerun()
+
 with tab4:
     st.markdown("### 全ソース横断検索 🔍")
     
@@ -1362,7 +1375,7 @@ with tab4:
         
     if search_query:
         with st.spinner(f"'{search_query}' で全ソースを検索中..."):
-            results = get_search_results(search_query)
+            results = get_search_results(search_query, since=date_cutoff())
             
             filtered_results = results
 
@@ -1378,6 +1391,7 @@ with tab4:
                 search_grouped = group_articles(search_final)
                 st.caption(f"(グルーピング済)")
                 
+                thumbs = thumbnail_map([g[0].get('img_src') or st.session_state.get(f"sic_{i}_{g[0]['link']}") for i, g in enumerate(search_grouped)])
                 cols = st.columns(3)
                 for i, group in enumerate(search_grouped):
                     main_item = group[0]
@@ -1389,11 +1403,11 @@ with tab4:
                         img = main_item.get('img_src') or st.session_state.get(ik)
                         
                         st.markdown(f'<div class="news-meta">{main_item["source"]} • {main_item["published"]}</div>', unsafe_allow_html=True)
-                        if img: st.markdown(f'<a href="{main_item["link"]}" target="_blank"><img src="{img}" class="news-thumb"></a>', unsafe_allow_html=True)
-                        st.markdown(f'<a href="{main_item["link"]}" target="_blank" class="news-title-link"><div class="news-title">{main_item["title"]}</div></a>', unsafe_allow_html=True)
+                        if img: st.markdown(f'<a href="{main_item["link"]}" target="_blank"><img src="{thumbs.get(img, img)}" class="news-thumb"></a>', unsafe_allow_html=True)
+                        st.markdown(f'<a href="{main_item["link"]}" target="_blank" class="news-title-link"><div class="news-title">{text_html(main_item["title"])}</div></a>', unsafe_allow_html=True)
                         
                         if main_item['summary']:
-                            st.markdown(f'<div class="news-excerpt">{main_item["summary"]}</div>', unsafe_allow_html=True)
+                            st.markdown(f'<div class="news-excerpt">{text_html(main_item["summary"])}</div>', unsafe_allow_html=True)
                         
                         b1, b2 = st.columns(2)
                         with b1:
@@ -1403,17 +1417,10 @@ with tab4:
                                     st.rerun()
                         with b2:
                             if st.button("保存 🔖", key=f"s_sav_{i}", use_container_width=True):
-                                # Save logic
-                                existing = [b for b in st.session_state.bookmarks if b['link'] == main_item['link']]
-                                if existing:
-                                    st.session_state.bookmarks = [b for b in st.session_state.bookmarks if b['link'] != main_item['link']]
-                                    st.toast("保存を解除しました")
-                                else:
-                                    st.session_state.bookmarks.append(main_item)
+                                if toggle_bookmark(main_item):
                                     st.toast("保存しました")
-                                
-                                if st.session_state.user:
-                                    db.save_user_data(st.session_state.user, 'bookmarks', st.session_state.bookmarks)
+                                else:
+                                    st.toast("保存を解除しました")
                                 st.rerun()
                         
                         # Show Related Search Results
@@ -1423,18 +1430,14 @@ with tab4:
                                     st.markdown(f"- [{rel['source']}] [{rel['title']}]({rel['link']})")
 
                         st.markdown('</div>', unsafe_allow_html=True)
-                        st.markdown(f'<a href="{item["link"]}" target="_blank" class="news-title-link"><div class="news-title">{item["title"]}</div></a>', unsafe_allow_html=True)
+                        st.markdown(f'<a href="{item["link"]}" target="_blank" class="news-title-link"><div class="news-title">{text_html(item["title"])}</div></a>', unsafe_allow_html=True)
                         
                         if item['summary']:
-                            st.markdown(f'<div class="news-excerpt">{item["summary"]}</div>', unsafe_allow_html=True)
+                            st.markdown(f'<div class="news-excerpt">{text_html(item["summary"])}</div>', unsafe_allow_html=True)
                             
                         if st.button("保存 🔖", key=f"search_sav_{i}", use_container_width=True):
-                            if not any(b['link'] == item['link'] for b in st.session_state.bookmarks):
-                                st.session_state.bookmarks.append(item)
+                            if add_bookmark(item):
                                 st.toast("保存しました")
-                                # Save to DB
-                                if st.session_state.user:
-                                    db.save_user_data(st.session_state.user, 'bookmarks', st.session_state.bookmarks)
                         
                 
                 st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,89 @@
+"""Benchmark: bytes per article and pickle size, dict vs. models.Article.
+
+Builds a working set of N articles (default 100k) the way the app gets
+them: decoded from stored JSON, so every record has its own copies of the
+source / category strings. The old layout is the dict parse_feed used to
+return ('id' = link, formatted 'published' next to 'published_ts'); the
+new one is Article.from_dict over the same records. Memory is measured
+with tracemalloc, and pickle size with pickle.dumps (what st.cache_data
+stores per return value).
+
+    python benchmarks/bench_article_memory.py --articles 100000
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Article, format_published  # noqa: E402
+
+SOURCES = ["Bing News", "Yahoo! ニュース", "ライブドアニュース", "Google News", "NHK ニュース", "Gigazine",
+           "ITmedia", "CNET Japan", "TechCrunch Japan", "Qiita", "Zenn", "ナタリー"]
+KANJI = "日本政府経済市場技術開発企業株式会社東京都大阪府新型発表予定計画関連情報全国調査結果世界最大のがをにでと"
+
+
+def make_records(rng, n):
+    now = int(time.time())
+    records = []
+    for i in range(n):
+        link = f"https://news.example.com/articles/{i:08d}?utm_source=rss"
+        ts = now - rng.randint(0, 30 * 86400)
+        records.append({
+            'title': "".join(rng.choice(KANJI) for _ in range(rng.randint(15, 40))),
+            'link': link,
+            'summary': "".join(rng.choice(KANJI) for _ in range(rng.randint(40, 120))),
+            'img_src': f"https://img.example.com/{i}.jpg" if i % 3 else "",
+            'source': rng.choice(SOURCES),
+            'id': link,
+            'published': format_published(ts),
+            'published_ts': ts,
+        })
+    return json.dumps(records, ensure_ascii=False)
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return items, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=100_000)
+    args = parser.parse_args()
+    blob = make_records(random.Random(0), args.articles)
+    n = args.articles
+
+    dicts, dict_bytes = measure(lambda: json.loads(blob))
+
+    def build_articles():
+        return [Article.from_dict(d) for d in json.loads(blob)]
+
+    articles, article_bytes = measure(build_articles)
+
+    assert all(a['link'] == d['link'] and a['published'] == d['published'] and a['source'] == d['source']
+               for a, d in zip(articles, dicts))
+
+    print(f"{n} articles")
+    for name, items, size in (("dict", dicts, dict_bytes), ("Article", articles, article_bytes)):
+        t0 = time.perf_counter()
+        data = pickle.dumps(items)
+        restored = pickle.loads(data)
+        roundtrip = time.perf_counter() - t0
+        assert restored == items
+        print(f"{name:8s} {size / n:7.0f} B/article  pickle {len(data) / n:6.0f} B/article "
+              f"({len(data) / 2**20:.1f} MB, round trip {roundtrip * 1000:.0f} ms)")
+    print(f"{len({id(a.source) for a in restored})} distinct source objects after unpickling")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: hit ratio of BoundedCache (LRU + TinyLFU admission) vs. plain LRU.
+
+Replays a fetch_news-like key stream: every rerun asks for the same few
+dozen headline feeds and a Zipf-distributed mix of keyword searches, and
+bursts of one-off queries (typed searches nobody repeats) arrive in
+between. Both caches get the same entry budget. Plain LRU is the same
+class with admission switched off, so the only difference is TinyLFU.
+
+    python benchmarks/bench_bounded_cache.py --requests 200000 --capacity 64
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bounded_cache  # noqa: E402
+
+
+class PlainLRU(bounded_cache.BoundedCache):
+    """Admits everything, evicting from the LRU end."""
+
+    def _victims(self, key, size, now):
+        free, victims = self.max_bytes - self.bytes, []
+        entries = len(self.entries)
+        for victim, (_, victim_size, _) in self.entries.items():
+            if entries < self.max_entries and size <= free:
+                break
+            victims.append(victim)
+            entries -= 1
+            free += victim_size
+        return victims
+
+
+def workload(rng, n, feeds, keywords, burst):
+    weights = [1 / (i + 1) for i in range(keywords)]
+    one_off = 0
+    keys = []
+    while len(keys) < n:
+        keys.extend(("feed", i) for i in range(feeds))
+        keys.extend(("kw", k) for k in rng.choices(range(keywords), weights, k=feeds // 2))
+        if rng.random() < 0.3:
+            keys.extend(("once", one_off + i) for i in range(burst))
+            one_off += burst
+    return keys[:n]
+
+
+def replay(cache, keys):
+    t0 = time.perf_counter()
+    for key in keys:
+        cache.get_or_load(key, lambda: b"x" * 2048)
+    elapsed = time.perf_counter() - t0
+    return cache.snapshot(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--capacity", type=int, default=64)
+    parser.add_argument("--feeds", type=int, default=24)
+    parser.add_argument("--keywords", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=40)
+    args = parser.parse_args()
+
+    keys = workload(random.Random(0), args.requests, args.feeds, args.keywords, args.burst)
+    print(f"{len(keys)} lookups, {len(set(keys))} distinct keys, capacity {args.capacity}")
+    for name, cls in (("LRU", PlainLRU), ("TinyLFU", bounded_cache.BoundedCache)):
+        cache = cls(name, args.capacity, 1 << 30, ttl=3600, sizeof=len)
+        s, elapsed = replay(cache, keys)
+        print(f"{name:8s} hit ratio {s['hit_ratio']:6.1%}  evictions {s['evictions']:7d}  rejected {s['rejected']:7d}  "
+              f"({elapsed / len(keys) * 1e6:.1f} µs/lookup)")
+
+
+if __name__ == "__main__":
+    main()
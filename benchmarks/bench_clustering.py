@@ -0,0 +1,122 @@
+"""Benchmark + agreement check: MinHash/LSH grouping vs. SequenceMatcher grouping.
+
+The reference is the original O(n^2) group_articles / is_similar loop.
+Synthetic headlines (common news words + long-tail filler) are generated as
+stories with several outlet-style variants (prefixes, suffixes, trimmed ends).
+Exits non-zero if pair recall or precision against the reference falls
+below --min-recall / --min-precision at any size.
+
+    python benchmarks/bench_clustering.py --sizes 60,500,2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clustering import MinHashClusterer, title_ratio  # noqa: E402
+
+WORDS = [
+    "政府", "経済対策", "閣議決定", "日銀", "金融政策", "据え置き", "円相場", "一時", "円台", "株価",
+    "続落", "半導体", "新工場", "建設", "発表", "生成AI", "規制", "議論", "本格化", "大谷翔平",
+    "本塁打", "記録", "更新", "地震", "震度", "観測", "新型", "iPhone", "販売", "開始", "台風",
+    "接近", "警戒", "呼びかけ", "首相", "会見", "ChatGPT", "新機能", "公開", "トヨタ", "決算",
+]
+PARTICLES = ["の", "が", "を", "に", "で", "と", "、", "へ"]
+KANJI = "日本政府経済市場技術開発企業株式会社東京都大阪府新型発表予定計画関連情報全国調査結果世界最大"
+PREFIXES = ["", "", "【速報】", "<独自>", "【解説】"]
+SUFFIXES = ["", "", " - 日本経済新聞", "（共同通信）", " | NHK", "：朝日新聞"]
+
+
+def headline(rng, filler):
+    parts = []
+    for _ in range(rng.randint(4, 7)):
+        parts.append(rng.choice(WORDS) if rng.random() < 0.3 else rng.choice(filler))
+        parts.append(rng.choice(PARTICLES))
+    return "".join(parts[:-1])
+
+
+def variant(rng, base):
+    text = base
+    if rng.random() < 0.4 and len(text) > 12:
+        cut = rng.randint(0, 4)
+        text = text[cut:len(text) - rng.randint(0, 4)]
+    return rng.choice(PREFIXES) + text + rng.choice(SUFFIXES)
+
+
+def make_articles(n, rng):
+    filler = ["".join(rng.choice(KANJI) for _ in range(rng.randint(2, 4))) for _ in range(3000)]
+    articles = []
+    while len(articles) < n:
+        base = headline(rng, filler)
+        for _ in range(rng.choice([1, 1, 1, 2, 3, 4])):
+            articles.append({'title': variant(rng, base)})
+    rng.shuffle(articles)
+    return articles[:n]
+
+
+def reference_group(articles, threshold=0.6):
+    """The original group_articles (all pairs, SequenceMatcher)."""
+    groups, processed = [], set()
+    comparisons = 0
+    for i, article in enumerate(articles):
+        if i in processed:
+            continue
+        current_group = [article]
+        processed.add(i)
+        for j in range(i + 1, len(articles)):
+            if j in processed:
+                continue
+            comparisons += 1
+            if title_ratio(article['title'], articles[j]['title']) > threshold:
+                current_group.append(articles[j])
+                processed.add(j)
+        groups.append(current_group)
+    return groups, comparisons
+
+
+def membership(groups):
+    """Set of (leader id, member id) pairs, for agreement scoring."""
+    return {(id(g[0]), id(m)) for g in groups for m in g[1:]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="60,500,2000")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--min-recall", type=float, default=0.90)
+    parser.add_argument("--min-precision", type=float, default=0.95)
+    args = parser.parse_args()
+
+    clusterer = MinHashClusterer(threshold=args.threshold)
+    ok = True
+    for n in [int(s) for s in args.sizes.split(",")]:
+        articles = make_articles(n, random.Random(n))
+
+        t0 = time.perf_counter()
+        ref, ref_cmp = reference_group(articles, args.threshold)
+        ref_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        lsh = clusterer.group(articles)
+        lsh_s = time.perf_counter() - t0
+
+        ref_pairs, lsh_pairs = membership(ref), membership(lsh)
+        common = len(ref_pairs & lsh_pairs)
+        recall = common / len(ref_pairs) if ref_pairs else 1.0
+        precision = common / len(lsh_pairs) if lsh_pairs else 1.0
+        same_groups = len({tuple(map(id, g)) for g in ref} & {tuple(map(id, g)) for g in lsh})
+        print(f"n={n:>6}  reference={ref_s * 1000:9.1f}ms ({ref_cmp:>9,} cmp)  "
+              f"minhash={lsh_s * 1000:8.1f}ms ({clusterer.comparisons:>7,} cmp)  "
+              f"groups {len(ref)}/{len(lsh)}  identical={same_groups / len(ref):.1%}  "
+              f"pair recall={recall:.1%} precision={precision:.1%}")
+        if recall < args.min_recall or precision < args.min_precision:
+            ok = False
+            print(f"  below minimum agreement (recall {args.min_recall:.0%}, precision {args.min_precision:.0%})")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Benchmark: per-call sqlite3.connect vs. pooled WAL connections under concurrency.
+
+N threads each play a user session in a loop: login (ensure user, create +
+verify a persistent session), settings load (keywords, bookmarks, theme,
+mute words) and a bookmark save. "connect" reproduces the old behaviour (a
+fresh rollback-journal connection per call); "pooled" uses database.get_conn().
+
+Streamlit runs every rerun on a new script thread, so the "rerun" modes run
+each visit on a fresh short-lived thread: "rerun-local" with POOL_SIZE=0
+(a connection per thread, what a thread-local pool amounts to there) and
+"rerun-pool" with the process-wide pool. "opened" counts connections made.
+
+Wait time is the time ops spent above their uncontended (1 session) median,
+i.e. mostly waiting for the database lock.
+
+    python benchmarks/bench_db_pool.py --sessions 1,8,32 --seconds 5
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db  # noqa: E402
+
+SETTINGS = ['keywords', 'bookmarks', 'theme', 'mute_words']
+
+
+def connect_per_call():
+    return sqlite3.connect(db.DB_FILE, timeout=db.BUSY_TIMEOUT_MS / 1000)
+
+
+def session_ops(email, ip):
+    """One simulated session visit as a list of (op name, callable)."""
+    state = {}
+
+    def login():
+        db.ensure_user_exists(email)
+        state['token'] = db.create_persistent_session(email, ip)
+        db.verify_persistent_session(state['token'], ip)
+
+    def load_settings():
+        for key in SETTINGS:
+            db.load_user_data(email, key, [])
+
+    def save_bookmark():
+        bookmarks = db.load_user_data(email, 'bookmarks', [])
+        bookmarks = (bookmarks + [{'link': f"https://example.com/{len(bookmarks)}"}])[-20:]
+        db.save_user_data(email, 'bookmarks', bookmarks)
+
+    def logout():
+        db.delete_persistent_session(state.pop('token', None))
+
+    return [('login', login), ('settings', load_settings), ('bookmark', save_bookmark), ('logout', logout)]
+
+
+def run(sessions, seconds, thread_per_visit=False):
+    """Returns (ops, elapsed, {op: [latencies]}, errors)."""
+    latencies = {}
+    lock = threading.Lock()
+    errors = []
+    stop = time.perf_counter() + seconds
+    barrier = threading.Barrier(sessions)
+
+    def worker(n):
+        local = {}
+        ops = session_ops(f"user{n}@example.com", f"10.0.{n % 256}.1")
+
+        def visit():
+            for name, fn in ops:
+                t0 = time.perf_counter()
+                try:
+                    fn()
+                except sqlite3.OperationalError as e:
+                    errors.append(str(e))
+                local.setdefault(name, []).append(time.perf_counter() - t0)
+
+        barrier.wait()
+        while time.perf_counter() < stop:
+            if thread_per_visit:
+                rerun = threading.Thread(target=visit)
+                rerun.start()
+                rerun.join()
+            else:
+                visit()
+        db.close_conn()
+        with lock:
+            for name, values in local.items():
+                latencies.setdefault(name, []).extend(values)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(sessions)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return sum(map(len, latencies.values())), elapsed, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", default="1,8,32")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sessions.split(",")]
+
+    pooled_get_conn = db.get_conn
+    pool_size = db.POOL_SIZE
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("connect", "pooled", "rerun-local", "rerun-pool"):
+            db.DB_FILE = os.path.join(tmp, f"{mode}.db")
+            db.POOL_SIZE = 0 if mode == "rerun-local" else pool_size
+            db.invalidate_user_profile()
+            per_visit = mode.startswith("rerun")
+            if mode == "connect":
+                # Old behaviour: default rollback journal, new connection per call
+                db.get_conn = connect_per_call
+                db.init_db()
+            else:
+                db.get_conn = pooled_get_conn
+                db.init_db()
+                db.close_conn()
+
+            _, _, base, _ = run(1, min(args.seconds, 2), per_visit)
+            base_median = {name: statistics.median(v) for name, v in base.items()}
+            for n in sizes:
+                opened = db.pool_stats['opened']
+                ops, elapsed, latencies, errors = run(n, args.seconds, per_visit)
+                opened = db.pool_stats['opened'] - opened if mode != "connect" else "-"
+                wait = sum(max(0.0, t - base_median[name]) for name, v in latencies.items() for t in v)
+                all_lat = sorted(t for v in latencies.values() for t in v)
+                p99 = all_lat[int(len(all_lat) * 0.99)] * 1000 if all_lat else 0
+                print(f"{mode:11s} sessions={n:3d}  {ops / elapsed:8.0f} ops/s  "
+                      f"p99 {p99:7.2f} ms  wait {wait / max(ops, 1) * 1000:6.2f} ms/op  "
+                      f"opened {opened}  errors={len(errors)}")
+            db.close_pool()
+    db.get_conn = pooled_get_conn
+    db.POOL_SIZE = pool_size
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Benchmark: feedparser vs. the fastfeed iterparse path in parse_feed.
+
+Generates feeds shaped like our sources (Bing-style RSS 2.0 with
+<News:Image>, Google News RSS with HTML descriptions, Gigazine-style
+content:encoded, CNET's RDF and Qiita's Atom), or reads saved captures
+from --fixtures DIR (*.xml / *.rdf / *.rss / *.atom, parsed as source
+"Fixture"). Reports entries/sec for both paths and checks that
+parse_feed returns identical article dicts and that no title keeps markup
+(some generated titles carry escaped <img onerror>, <style>, <script>).
+
+    python benchmarks/bench_feed_parser.py --items 50 --rounds 20
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+from email.utils import formatdate
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fastfeed  # noqa: E402
+import feeds  # noqa: E402
+
+WORDS = "新型 発表 政府 経済 市場 技術 開発 企業 東京 大阪 AI 半導体 円相場 スマホ 調査 結果 & < 予定".split()
+
+
+# Titles user content controls: markup (escaped in the XML) and entities must come out as plain text
+HOSTILE_TITLES = ['<img src=x onerror=alert(1)>画像', '<style>body{display:none}</style>速報',
+                  '<script>alert(1)</script>AT&T 決算', '<b>太字</b> &amp; 1 < 2', '&lt;i&gt;二重&lt;/i&gt;']
+
+
+def words(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def title(rng, n):
+    return escape(rng.choice(HOSTILE_TITLES) if rng.random() < 0.2 else words(rng, n))
+
+
+def rfc822(rng):
+    return formatdate(1760000000 - rng.randint(0, 86400 * 3), usegmt=rng.random() < 0.5) if rng.random() < 0.9 \
+        else "Tue, 14 Oct 2025 10:00:00 JST"
+
+
+def iso(rng):
+    ts = 1760000000 - rng.randint(0, 86400 * 3)
+    return time.strftime("%Y-%m-%dT%H:%M:%S+09:00", time.gmtime(ts + 9 * 3600))
+
+
+def html_summary(rng, i):
+    img = f'<img src="https://img.example.com/{i}.jpg" width="120">' if rng.random() < 0.6 else ""
+    return (f'<p>{escape(words(rng, 30))}</p>{img}<a href="https://example.com/{i}?a=1&amp;b=2">続きを読む</a>'
+            + ('<script>track()</script>' if rng.random() < 0.1 else ""))
+
+
+def bing_rss(rng, n):
+    items = "".join(
+        f"<item><title>{title(rng, 8)}</title><link>https://www.bing.com/news/apiclick.aspx?url={i}&amp;tid=x</link>"
+        f"<description>{escape(words(rng, 40))}</description><pubDate>{rfc822(rng)}</pubDate>"
+        f"<News:Source>ソース</News:Source>"
+        + (f"<News:Image>https://www.bing.com/th?id=OVFT.{i}&amp;pid=News</News:Image>" if i % 3 else "")
+        + "</item>" for i in range(n))
+    return ('<?xml version="1.0" encoding="utf-8"?><rss version="2.0" '
+            'xmlns:News="https://www.bing.com/news/search?q=x&amp;format=rss">'
+            f'<channel><title>Bing</title><link>https://www.bing.com/news</link>{items}</channel></rss>').encode()
+
+
+def google_rss(rng, n):
+    items = "".join(
+        f"<item><title>{escape(words(rng, 10))} - 新聞社</title><link>https://news.google.com/rss/articles/{i}?oc=5</link>"
+        f"<guid isPermaLink=\"false\">{i}</guid><pubDate>{rfc822(rng)}</pubDate>"
+        f"<description>{escape(html_summary(rng, i))}</description><source url=\"https://x\">新聞社</source></item>"
+        for i in range(n))
+    return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/">'
+            f'<channel><title>Google News</title><link>https://news.google.com</link>{items}</channel></rss>').encode()
+
+
+def content_rss(rng, n):
+    items = "".join(
+        f"<item><title>{escape(words(rng, 8))}</title><link>https://gigazine.net/news/{i}/</link>"
+        f"<pubDate>{rfc822(rng)}</pubDate><description><![CDATA[{words(rng, 20)}]]></description>"
+        f"<content:encoded><![CDATA[{html_summary(rng, i)}]]></content:encoded>"
+        + (f'<enclosure url="https://i.gigazine.net/{i}.png" type="image/png" length="1"/>' if i % 2 else "")
+        + (f'<media:thumbnail url="https://m.example.com/{i}.jpg"/>' if i % 5 == 0 else "")
+        + "</item>" for i in range(n))
+    return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0" '
+            'xmlns:content="http://purl.org/rss/1.0/modules/content/" xmlns:media="http://search.yahoo.com/mrss/">'
+            f'<channel><title>GIGAZINE</title><link>https://gigazine.net/</link>{items}</channel></rss>').encode()
+
+
+def cnet_rdf(rng, n):
+    items = "".join(
+        f'<item rdf:about="https://japan.cnet.com/article/{i}/"><title>{escape(words(rng, 8))}</title>'
+        f"<link>https://japan.cnet.com/article/{i}/</link><description>{escape(words(rng, 30))}</description>"
+        f"<dc:date>{iso(rng)}</dc:date></item>" for i in range(n))
+    return ('<?xml version="1.0" encoding="UTF-8"?><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+            'xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            '<channel rdf:about="https://japan.cnet.com/"><title>CNET Japan</title><link>https://japan.cnet.com/</link></channel>'
+            f'{items}</rdf:RDF>').encode()
+
+
+def qiita_atom(rng, n):
+    entries = "".join(
+        f"<entry><id>tag:qiita.com,2005:PublicArticle/{i}</id><published>{iso(rng)}</published><updated>{iso(rng)}</updated>"
+        f'<link rel="alternate" type="text/html" href="https://qiita.com/u/items/{i}"/><title type="html">{title(rng, 8)}</title>'
+        f'<content type="html">{escape(html_summary(rng, i))}</content><author><name>u{i}</name></author></entry>'
+        for i in range(n))
+    return ('<?xml version="1.0" encoding="UTF-8"?><feed xml:lang="ja-JP" xmlns="http://www.w3.org/2005/Atom">'
+            f'<id>tag:qiita.com,2005:/tags/python</id><title>Python</title><updated>{iso(rng)}</updated>{entries}</feed>').encode()
+
+
+GENERATORS = {
+    "Bing News": bing_rss, "Google News": google_rss, "Gigazine": content_rss,
+    "CNET Japan": cnet_rdf, "Qiita": qiita_atom,
+}
+
+
+def feedparser_only(content, source):
+    """parse_feed as it was: every body through feedparser."""
+    parse = fastfeed.parse
+
+    def unsupported(_):
+        raise fastfeed.Unsupported("benchmark baseline")
+
+    fastfeed.parse = unsupported
+    try:
+        return feeds.parse_feed(content, source)
+    finally:
+        fastfeed.parse = parse
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", help="directory of saved feed bodies")
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    if args.fixtures:
+        paths = sorted(p for ext in ("xml", "rdf", "rss", "atom") for p in glob.glob(os.path.join(args.fixtures, f"*.{ext}")))
+        bodies = [("Fixture", open(p, "rb").read()) for p in paths]
+    else:
+        bodies = [(source, make(rng, args.items)) for source, make in GENERATORS.items()]
+
+    results = {}
+    for name, fn in (("feedparser", feedparser_only), ("fastfeed", feeds.parse_feed)):
+        outputs = [fn(body, source) for source, body in bodies]  # warm-up, also the equivalence sample
+        entries = sum(map(len, outputs)) * args.rounds
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            for source, body in bodies:
+                fn(body, source)
+        elapsed = time.perf_counter() - t0
+        results[name] = outputs
+        print(f"{name:10s}  {entries / elapsed:9.0f} entries/s  ({elapsed * 1000 / args.rounds:.1f} ms per refresh of {len(bodies)} feeds)")
+
+    mismatched = 0
+    for (source, _), old, new in zip(bodies, results["feedparser"], results["fastfeed"]):
+        if old != new:
+            mismatched += 1
+            diff = next(((a, b) for a, b in zip(old, new) if a != b), (len(old), len(new)))
+            print(f"  {source}: differs, first: {diff}")
+    print(f"identical article dicts: {mismatched == 0} ({len(bodies) - mismatched}/{len(bodies)} feeds)")
+    marked_up = [a['title'] for out in results.values() for items in out for a in items if feeds._TAG.search(a['title'])]
+    for t in marked_up[:5]:
+        print(f"  title keeps markup: {t!r}")
+    print(f"titles with markup: {len(marked_up)}")
+    print(f"fast path / fallback: {fastfeed.stats['fast']} / {fastfeed.stats['fallback']}")
+    sys.exit(0 if mismatched == 0 and not marked_up else 1)
+
+
+if __name__ == "__main__":
+    main()
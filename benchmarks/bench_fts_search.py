@@ -0,0 +1,131 @@
+"""Benchmark: local FTS5 search latency over a synthetic article archive.
+
+Builds throwaway databases of N Japanese/English headlines and times
+database.search_articles() for a fixed query mix. First checks a table of
+queries against a small hand-written archive (exits non-zero on a miss).
+
+    python benchmarks/bench_fts_search.py --sizes 100000,1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db  # noqa: E402
+
+WORDS = [
+    "生成AI", "経済", "株価", "円相場", "半導体", "選挙", "政府", "日銀", "金利", "野球",
+    "サッカー", "映画", "音楽", "アニメ", "ゲーム", "iPhone", "Android", "Google", "Apple",
+    "Python", "ChatGPT", "機械学習", "ビットコイン", "地震", "台風", "東京", "大阪", "新製品",
+    "発表", "開始", "予想", "速報", "最新", "調査", "企業", "市場", "決算", "規制", "技術", "開発",
+]
+PARTICLES = ["の", "が", "を", "に", "で", "と", "、"]
+KANJI = "日本政府経済市場技術開発企業株式会社東京都大阪府新型発表予定計画関連情報全国調査結果世界最大"
+COMMON_RATIO = 0.15  # share of words drawn from WORDS; the rest is long-tail filler
+QUERIES = ["AI", "経済", "半導体", "生成AI", "Python", "株価 金利", "日銀", "機械学習", "地震 速報", "野"]
+
+
+# Hand-written archive for the match check: (title, summary)
+CHECK_ARTICLES = [
+    ("東京で大雨 交通に影響", "各地で警戒が続く"),
+    ("Python 3.13 がリリース", "新しいJITを搭載"),
+    ("生成AI規制の議論が本格化", "EUで合意"),
+    ("雨の日の過ごし方", "室内で楽しむ"),
+]
+# (query, titles it must return, in any order)
+CHECK_CASES = [
+    ("雨", {"東京で大雨 交通に影響", "雨の日の過ごし方"}),  # 雨 ends the run 東京で大雨
+    ("大雨", {"東京で大雨 交通に影響"}),
+    ("響", {"東京で大雨 交通に影響"}),  # one-character run end in a title
+    ("pyth", {"Python 3.13 がリリース"}),  # ASCII words match as prefixes
+    ("PYTHON", {"Python 3.13 がリリース"}),
+    ("thon", set()),  # ... but not mid-word
+    ("jit", {"Python 3.13 がリリース"}),
+    ("AI規制", {"生成AI規制の議論が本格化"}),
+    ("生成ai", {"生成AI規制の議論が本格化"}),
+    ("大雨 交通", {"東京で大雨 交通に影響"}),
+    ("大雨 python", set()),
+]
+
+
+def check():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "check.db")
+        db.init_db()
+        db.upsert_articles([{'title': t, 'summary': s, 'link': f"https://example.com/check/{i}", 'source': "Check"}
+                            for i, (t, s) in enumerate(CHECK_ARTICLES)], "HEADLINES")
+        for query, expected in CHECK_CASES:
+            got = {a['title'] for a in db.search_articles(query)}
+            if got != expected:
+                failures += 1
+                print(f"  {query!r} ({db.fts_query(query)}): got {sorted(got)}, expected {sorted(expected)}")
+        db.close_conn()
+    print(f"match check: {len(CHECK_CASES)} queries, {failures} failures")
+    return failures == 0
+
+
+def filler_words(rng, count=5000):
+    return ["".join(rng.choice(KANJI) for _ in range(rng.randint(2, 4))) for _ in range(count)]
+
+
+def headline(rng, filler):
+    parts = []
+    for _ in range(rng.randint(4, 8)):
+        parts.append(rng.choice(WORDS) if rng.random() < COMMON_RATIO else rng.choice(filler))
+        parts.append(rng.choice(PARTICLES))
+    return "".join(parts[:-1])
+
+
+def build(size, rng, batch=5000):
+    now = int(time.time())
+    filler = filler_words(rng)
+    for start in range(0, size, batch):
+        db.upsert_articles([{
+            'title': headline(rng, filler),
+            'summary': headline(rng, filler) + "。" + headline(rng, filler),
+            'link': f"https://example.com/article/{i}",
+            'source': rng.choice(["Yahoo! ニュース", "NHK ニュース", "ITmedia", "Qiita"]),
+            'img_src': "",
+            'published_ts': now - rng.randint(0, 86400 * 365),
+        } for i in range(start, min(size, start + batch))], "HEADLINES")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    ok = check()
+    for size in [int(s) for s in args.sizes.split(",")]:
+        rng = random.Random(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_FILE = os.path.join(tmp, "bench.db")
+            db.init_db()
+            start = time.perf_counter()
+            build(size, rng)
+            build_s = time.perf_counter() - start
+
+            times = []
+            for _ in range(args.rounds):
+                for q in QUERIES:
+                    t0 = time.perf_counter()
+                    db.search_articles(q, limit=50)
+                    times.append(time.perf_counter() - t0)
+            times.sort()
+            p95 = times[int(len(times) * 0.95)]
+            print(f"{size:>9,} articles  build={build_s:6.1f}s  "
+                  f"p50={statistics.median(times) * 1000:7.2f}ms  p95={p95 * 1000:7.2f}ms  "
+                  f"max={times[-1] * 1000:7.2f}ms")
+            db.close_conn()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark: bare requests.get vs. the shared http_client pool.
+
+Starts one local fixture server per "host" (12, like 総合トップ) and runs
+refreshes that fetch every feed in parallel. Reports handshakes (new TCP
+connections seen by the servers) per refresh and p50/p95 refresh time.
+
+    python benchmarks/bench_http_pool.py --refreshes 50 --handshake-ms 30
+"""
+import argparse
+import concurrent.futures
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+import http_client  # noqa: E402
+
+FEED_BODY = (b'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>fixture</title>'
+             + b''.join(b'<item><title>Item %d</title><link>https://example.com/%d</link>'
+                        b'<description>Fixture summary text</description></item>' % (i, i) for i in range(30))
+             + b'</channel></rss>')
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handshake_delay):
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.counter_lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), FeedHandler)
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.counter_lock:
+            self.server.connections += 1
+        # Simulated DNS + TCP + TLS cost, paid once per new connection
+        time.sleep(self.server.handshake_delay)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(FEED_BODY)))
+        self.end_headers()
+        self.wfile.write(FEED_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, fetch, urls, servers, refreshes):
+    for s in servers:
+        s.connections = 0
+    times = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+        for _ in range(refreshes):
+            start = time.perf_counter()
+            list(executor.map(fetch, urls))
+            times.append(time.perf_counter() - start)
+    handshakes = sum(s.connections for s in servers)
+    times.sort()
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+    print(f"{label:<16} handshakes/refresh={handshakes / refreshes:6.2f}  "
+          f"p50={statistics.median(times) * 1000:7.1f}ms  p95={p95 * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=12)
+    parser.add_argument("--refreshes", type=int, default=30)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    servers = [FixtureServer(args.handshake_ms / 1000) for _ in range(args.hosts)]
+    for s in servers:
+        threading.Thread(target=s.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{s.server_address[1]}/feed.xml" for s in servers]
+
+    def bare(url):
+        return requests.get(url, headers=http_client.DEFAULT_HEADERS, timeout=5).content
+
+    def pooled(url):
+        return http_client.get(url).content
+
+    run("before (bare)", bare, urls, servers, args.refreshes)
+    run("after (pooled)", pooled, urls, servers, args.refreshes)
+    print("pool stats:", http_client.stats())
+
+    for s in servers:
+        s.shutdown()
+
+
+if __name__ == "__main__":
+    main()
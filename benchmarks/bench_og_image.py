@@ -0,0 +1,130 @@
+"""Benchmark: full-page BeautifulSoup og:image lookup vs. the streaming head scanner.
+
+Article pages are served from a local HTTP server, so both paths do real
+requests. The fixtures come from --fixtures DIR (saved *.html article pages)
+or, by default, are generated: a typical news <head> (styles, scripts, meta
+tags) followed by a large body. Reports body bytes read per lookup,
+CPU time per lookup and whether both paths agree.
+
+    python benchmarks/bench_og_image.py --pages 40 --body-kb 300
+"""
+import argparse
+import glob
+import http.server
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import http_client  # noqa: E402
+import og_images  # noqa: E402
+
+
+def baseline(url):
+    """The original fetch_og_image: download everything, build a full tree."""
+    try:
+        response = http_client.get(url, timeout=5)
+        soup = BeautifulSoup(response.content, 'html.parser')
+        og = soup.find('meta', property='og:image')
+        if og:
+            return og.get('content') or ""
+    except Exception:
+        pass
+    return ""
+
+
+def make_page(rng, n, body_kb):
+    head = [
+        '<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8">',
+        f'<title>記事 {n} | ニュース</title>',
+        '<style>' + ('.c{margin:0;padding:0}' * 200) + '</style>',
+        '<script>' + ('window.dataLayer=window.dataLayer||[];' * 100) + '</script>',
+        '<meta name="description" content="' + '概要テキスト' * 20 + '">',
+    ]
+    if n % 10 != 0:  # every 10th page has no og:image
+        head.append(f'<meta property="og:image" content="https://img.example.com/{n}.jpg?w=1200&amp;h=630">')
+    head.append('<meta name="twitter:card" content="summary_large_image"></head>')
+    paragraph = '<p>' + '本文のテキストが続きます。' * 20 + '</p>'
+    body = ['<body><article>']
+    while sum(map(len, body)) < body_kb * 1024 // 3:
+        body.append(paragraph + f'<img src="/inline/{rng.randint(0, 9999)}.jpg">')
+    body.append('</article></body></html>')
+    return ''.join(head + body).encode('utf-8')
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    pages = {}
+
+    def do_GET(self):
+        body = self.pages.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", help="directory of saved article *.html pages")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--body-kb", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    if args.fixtures:
+        files = sorted(glob.glob(os.path.join(args.fixtures, "*.html")))
+        Handler.pages = {f"/{i}": open(f, "rb").read() for i, f in enumerate(files)}
+    else:
+        Handler.pages = {f"/{i}": make_page(rng, i, args.body_kb) for i in range(args.pages)}
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    urls = [base + path for path in Handler.pages]
+    total_kb = sum(map(len, Handler.pages.values())) / 1024
+    print(f"{len(urls)} pages, {total_kb / len(urls):.0f} KB average")
+
+    # Count body bytes pulled off the wire (urllib3's raw position) per response
+    responses = []
+    plain_get = http_client.get
+
+    def counting_get(*a, **kw):
+        response = plain_get(*a, **kw)
+        responses.append(response)
+        return response
+
+    http_client.get = counting_get
+    results = {}
+    for name, fn in (("full page + bs4", baseline), ("streaming head", og_images.extract_og_image)):
+        responses.clear()
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        images = [fn(u) for u in urls]
+        cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+        read = sum(r.raw.tell() for r in responses)
+        results[name] = images
+        print(f"{name:16s}  {read / len(urls) / 1024:7.1f} KB/lookup  "
+              f"cpu {cpu / len(urls) * 1000:6.2f} ms/lookup  wall {wall / len(urls) * 1000:6.2f} ms/lookup")
+
+    http_client.get = plain_get
+    same = results["full page + bs4"] == results["streaming head"]
+    print(f"identical og:image results: {same}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
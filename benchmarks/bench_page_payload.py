@@ -0,0 +1,62 @@
+"""Benchmark: HTML payload per rerun of the おすすめ tab with 50 cards.
+
+Seeds a throwaway archive with 50 matching articles without images (so
+every card shows the placeholder), runs app.py headless with AppTest in
+guest mode, and sums the HTML/markdown the script sends on one rerun.
+
+    python benchmarks/bench_page_payload.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AINEWS_INGEST_MODE", "external")  # no upstream polling
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import database as db  # noqa: E402
+
+CARDS = 50
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        db.DB_FILE = os.path.join(tmp, "news_app_v2.db")
+        db.init_db()
+        now = time.time()
+        db.upsert_articles([{
+            'title': f"AI ニュース {i}", 'link': f"https://example.com/{i}", 'summary': "AI の要約",
+            'source': "Qiita", 'img_src': "", 'published_ts': now - i * 60,
+        } for i in range(CARDS)], category="BENCH")
+        # Older app.py revisions read app_icon.png from the working directory
+        if os.path.exists(os.path.join(ROOT, "app_icon.png")):
+            os.symlink(os.path.join(ROOT, "app_icon.png"), "app_icon.png")
+
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+        at.run()
+        for button in at.button:
+            if "ゲスト" in button.label:
+                button.click()
+                break
+        at.run()
+        at.text_input(key="new_keyword_input").input("AI").run()
+
+        t0 = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - t0
+        markdown = [m.value.encode("utf-8") for m in at.markdown]
+        css = sum(len(m) for m in markdown if m.lstrip().startswith(b"<style>"))
+        cards = sum(len(m) for m in markdown if b"news-thumb" in m)
+        total = sum(map(len, markdown))
+        print(f"{CARDS} cards, {len(markdown)} markdown elements, rerun {elapsed * 1000:.0f} ms")
+        print(f"total  {total / 1024:9.1f} KB/rerun")
+        print(f"css    {css / 1024:9.1f} KB")
+        print(f"images {cards / 1024:9.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
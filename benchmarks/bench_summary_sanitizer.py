@@ -0,0 +1,134 @@
+"""Benchmark + equivalence check: BeautifulSoup parse_summary vs. the regex sanitizer.
+
+The old parse_summary built a BeautifulSoup tree per entry for the first
+<img> and stripped tags with a recompiled '<.*?>'. The new one does neither.
+Its text is meant to equal the old text with entities decoded and cut to
+SUMMARY_MAX_CHARS, and its image the old image. The check runs a table of
+hand-written edge cases plus a generated corpus of feed-like summaries
+against that reference, then times both implementations.
+
+    python benchmarks/bench_summary_sanitizer.py --entries 2000
+"""
+import argparse
+import html
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import feeds  # noqa: E402
+
+
+def old_parse_summary(html_content):
+    """parse_summary / clean_html as they were."""
+    if not html_content: return "", ""
+    soup = BeautifulSoup(html_content, "html.parser")
+    img_tag = soup.find('img')
+    img_src = img_tag['src'] if img_tag else ""
+    cleantext = re.sub(re.compile('<.*?>'), '', html_content)
+    return ' '.join(cleantext.split()), img_src
+
+
+def reference(html_content):
+    """Old output with the intended changes applied (decoded entities, length cap)."""
+    text, img = old_parse_summary(html_content)
+    text = ' '.join(html.unescape(text).split())
+    if len(text) > feeds.SUMMARY_MAX_CHARS:
+        text = text[:feeds.SUMMARY_MAX_CHARS - 1].rstrip() + "…"
+    return text, img
+
+
+# (input, expected text, expected image) for the new parse_summary
+CASES = [
+    ("", "", ""),
+    ("plain text only", "plain text only", ""),
+    ("  lots \n of\t whitespace  ", "lots of whitespace", ""),
+    ("<p>Hello <b>world</b></p>", "Hello world", ""),
+    ("AT&amp;T &lt;b&gt; &#12354; &#x3042; &nbsp;x", "AT&T <b> あ あ x", ""),
+    ('<img src="https://e/a.jpg"><img src="https://e/b.jpg">', "", "https://e/a.jpg"),
+    ("<IMG SRC='https://e/upper.png' alt=x>text", "text", "https://e/upper.png"),
+    ('<img alt="x" src=https://e/bare.jpg width=1>', "", "https://e/bare.jpg"),
+    ('<img data-src="https://e/lazy.jpg" src="https://e/real.jpg">', "", "https://e/real.jpg"),
+    ('<img src="https://e/a.jpg?w=1&amp;h=2">', "", "https://e/a.jpg?w=1&h=2"),
+    ('<!-- <img src="https://e/hidden.jpg"> -->visible', "visible", ""),
+    ('<img\nsrc="https://e/nl.jpg"\n>multi-line tag', "multi-line tag", "https://e/nl.jpg"),
+    ('<a href="x">link</a> &amp;amp; double', "link &amp; double", ""),
+    ("1 < 2 and 3 > 2", "1 2", ""),
+    ("unterminated <tag", "unterminated <tag", ""),
+    ("あ" * 400, "あ" * (feeds.SUMMARY_MAX_CHARS - 1) + "…", ""),
+    ("<img alt='no src'>caption", "caption", ""),  # old code raised KeyError here
+    ('<img alt="x src=y" src="real">', "", "real"),  # src= inside another attribute's value
+    ("<img title='src=\"fake.jpg\"' data-x=1 SRC=https://e/ok.jpg>", "", "https://e/ok.jpg"),
+    ('<img src>bare attribute', "bare attribute", ""),
+]
+
+# Cases where the old output is knowingly not the reference
+INTENDED = {
+    "multi-line tag": "'<.*?>' did not cross newlines, so multi-line tags leaked into the text",
+    "visible": "'<.*?>' ended the comment at the first '>', leaving '-->' in the text",
+    "caption": "img without src raised KeyError",
+}
+
+WORDS = "新型 発表 政府 経済 市場 技術 開発 企業 東京 AI 半導体 円相場 &amp; &lt;注目&gt; &quot;速報&quot; &#12354;".split()
+
+
+def make_summary(rng, i):
+    parts = []
+    for _ in range(rng.randint(1, 6)):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40)))
+        parts.append(rng.choice([f"<p>{text}</p>", f"<div class='c'>{text}<br/></div>", text,
+                                 f'<a href="https://e/{i}?a=1&amp;b=2">{text}</a>']))
+    if rng.random() < 0.6:
+        src = rng.choice([f'"https://img/{i}.jpg"', f"'https://img/{i}.png?x=1&amp;y=2'", f"https://img/{i}.webp"])
+        parts.insert(rng.randint(0, len(parts)), f'<img alt="a" src={src} width="120">')
+    return "".join(parts)
+
+
+def check(corpus):
+    failures = 0
+    for raw, text, img in CASES:
+        got = feeds.parse_summary(raw)
+        if got != (text, img):
+            failures += 1
+            print(f"  case {raw[:40]!r}: got {got!r}, expected {(text, img)!r}")
+        else:
+            try:
+                same_as_old = reference(raw) == got
+            except KeyError:
+                same_as_old = False
+            if not same_as_old and text not in INTENDED:
+                failures += 1
+                print(f"  case {raw[:40]!r}: differs from the old output without being listed in INTENDED")
+    for raw in corpus:
+        if feeds.parse_summary(raw) != reference(raw):
+            failures += 1
+            print(f"  corpus {raw[:60]!r}: {feeds.parse_summary(raw)!r} != {reference(raw)!r}")
+    print(f"equivalence: {len(CASES)} cases + {len(corpus)} generated summaries, {failures} failures")
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpus = [make_summary(rng, i) for i in range(args.entries)]
+    ok = check(corpus)
+
+    for name, fn in (("bs4 + regex", old_parse_summary), ("sanitizer", feeds.parse_summary)):
+        t0 = time.perf_counter()
+        for raw in corpus:
+            fn(raw)
+        elapsed = time.perf_counter() - t0
+        print(f"{name:12s}  {len(corpus) / elapsed:9.0f} summaries/s  ({elapsed / len(corpus) * 1e6:.1f} µs each)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Bounded in-process caches with LRU eviction and TinyLFU admission.
+
+st.cache_data keeps one entry per distinct argument tuple for the whole TTL
+with no size limit, so every new search query or keyword adds memory that
+is only given back when it expires. A BoundedCache has an entry budget and
+a byte budget (values are sized by their pickled length), and it keeps
+hit / miss / eviction counters for the debug view.
+
+Recency decides which entry leaves (LRU). Frequency decides whether a new
+entry may push it out: a count-min sketch of recent key accesses (TinyLFU)
+is consulted when the cache is full, and a key seen less often than the
+entries it would evict is served but not stored. A burst of one-off
+queries therefore cannot flush the keys every rerun asks for. Sketch
+counters are halved every AGING_FACTOR x width accesses, so old
+popularity fades.
+
+Caches are process-wide (get_cache), so they survive Streamlit reruns.
+Concurrent misses for the same key share one load (SingleFlight).
+Values are shared, not copied: callers must not mutate them.
+"""
+import collections
+import pickle
+import threading
+import time
+
+from singleflight import SingleFlight
+
+SKETCH_DEPTH = 4
+SKETCH_MAX_COUNT = 15  # saturating 4-bit style counters
+AGING_FACTOR = 10  # halve the sketch after width * AGING_FACTOR increments
+_HALVE = bytes(i >> 1 for i in range(256))
+
+
+def estimate_size(value):
+    """Approximate size of a value in bytes (its pickled length)."""
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024
+
+
+class FrequencySketch:
+    """Count-min sketch of key frequencies with periodic aging."""
+
+    def __init__(self, capacity):
+        width = 64
+        while width < capacity * 4:
+            width *= 2
+        self.mask = width - 1
+        self.rows = [bytearray(width) for _ in range(SKETCH_DEPTH)]
+        self.additions = 0
+        self.sample_size = width * AGING_FACTOR
+
+    def _slots(self, key):
+        for i in range(SKETCH_DEPTH):
+            yield i, hash((i, key)) & self.mask
+
+    def increment(self, key):
+        for i, j in self._slots(key):
+            if self.rows[i][j] < SKETCH_MAX_COUNT:
+                self.rows[i][j] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.additions //= 2
+            for row in self.rows:
+                row[:] = row.translate(_HALVE)
+
+    def frequency(self, key):
+        return min(self.rows[i][j] for i, j in self._slots(key))
+
+
+class BoundedCache:
+    def __init__(self, name, max_entries, max_bytes, ttl, sizeof=estimate_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()  # key -> (value, size, expires_at), LRU first
+        self.bytes = 0
+        self.sketch = FrequencySketch(max_entries)
+        self.flights = SingleFlight()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'rejected': 0}
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self.lock:
+            self.sketch.increment(key)
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[2] > now:
+                    self.entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[0]
+                self._remove(key)
+                self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return default
+
+    def put(self, key, value):
+        """Store value unless the admission policy turns it away; returns whether it was stored."""
+        size = self.sizeof(value)
+        now = time.time()
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self.stats['rejected'] += 1
+                return False
+            victims = self._victims(key, size, now)
+            if victims is None:
+                self.stats['rejected'] += 1
+                return False
+            for victim in victims:
+                self._remove(victim)
+                self.stats['evictions'] += 1
+            self.entries[key] = (value, size, now + self.ttl)
+            self.bytes += size
+            return True
+
+    def _fits(self, size, entries=None, free=None):
+        entries = len(self.entries) if entries is None else entries
+        free = self.max_bytes - self.bytes if free is None else free
+        return entries < self.max_entries and size <= free
+
+    def _victims(self, key, size, now):
+        """LRU keys to drop so `size` more bytes fit, or None if key is not admitted."""
+        if self._fits(size):
+            return []
+        # Expired entries go first, wherever they are in the LRU order
+        for expired in [k for k, e in self.entries.items() if e[2] <= now]:
+            self._remove(expired)
+            self.stats['expired'] += 1
+        entries, free = len(self.entries), self.max_bytes - self.bytes
+        candidate = self.sketch.frequency(key)
+        victims = []
+        for victim, (_, victim_size, _) in self.entries.items():
+            if self._fits(size, entries, free):
+                break
+            # TinyLFU: only push out entries that are asked for less often
+            if self.sketch.frequency(victim) >= candidate:
+                return None
+            victims.append(victim)
+            entries -= 1
+            free += victim_size
+        return victims
+
+    def _remove(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.bytes -= size
+
+    def get_or_load(self, key, loader, *args, **kwargs):
+        """Cached value for key, else loader(*args, **kwargs) (stored if admitted)."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        return self.flights.do(key, self._load, key, loader, args, kwargs)
+
+    def _load(self, key, loader, args, kwargs):
+        value = loader(*args, **kwargs)
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def snapshot(self):
+        """Plain-dict view for status displays."""
+        with self.lock:
+            stats = dict(self.stats)
+            entries, size = len(self.entries), self.bytes
+        lookups = stats['hits'] + stats['misses']
+        return {
+            'name': self.name, 'entries': entries, 'max_entries': self.max_entries,
+            'bytes': size, 'max_bytes': self.max_bytes,
+            'hit_ratio': stats['hits'] / lookups if lookups else 0.0,
+            **stats,
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name, max_entries, max_bytes, ttl, sizeof=estimate_size):
+    """Process-wide cache by name; the budgets of the first call win."""
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = BoundedCache(name, max_entries, max_bytes, ttl, sizeof)
+                _caches[name] = cache
+    return cache
+
+
+def snapshot():
+    """Snapshots of every cache, in creation order."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [c.snapshot() for c in caches]
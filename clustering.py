@@ -0,0 +1,210 @@
+"""Near-duplicate title clustering with MinHash + LSH banding.
+
+Replaces the all-pairs SequenceMatcher loop in group_articles: each title is
+reduced to a MinHash signature of its character shingles, signatures are
+split into bands, and only titles that share a band bucket are compared.
+Candidates are confirmed with the SequenceMatcher ratio the old
+app.is_similar() used (title_ratio), so groups keep the old semantics (leader + every later
+title similar to it) at a fraction of the comparisons.
+"""
+import difflib
+import functools
+import re
+import threading
+import time
+import unicodedata
+import zlib
+
+import numpy as np
+
+import database as db
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+_STRIP_RE = re.compile(r'[\s\W_]+')
+
+
+def normalize_title(title):
+    """NFKC, lower-case, drop whitespace and punctuation."""
+    return _STRIP_RE.sub('', unicodedata.normalize('NFKC', title or '').lower())
+
+
+def shingles(title, k=2):
+    text = normalize_title(title)
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    """Stable (process-independent) MinHash over string shingles."""
+
+    def __init__(self, num_perm=72, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        hv = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingle_set),
+                         dtype=np.uint64, count=len(shingle_set))
+        # (a * x + b) mod p, wrapping in uint64 like the usual MinHash family
+        phv = np.bitwise_and((np.outer(hv, self.a) + self.b) % MERSENNE_PRIME, MAX_HASH)
+        return phv.min(axis=0)
+
+
+def band_keys(signature, bands, rows):
+    """One hashable bucket key per LSH band."""
+    return [(i, signature[i * rows:(i + 1) * rows].tobytes()) for i in range(bands)]
+
+
+def title_ratio(a, b):
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+class MinHashClusterer:
+    """Groups similar titles in near-linear time.
+
+    threshold: SequenceMatcher ratio a candidate must exceed (title_ratio).
+    bands x rows: LSH banding; more bands / fewer rows = higher recall, more candidates.
+    """
+
+    def __init__(self, threshold=0.6, bands=24, rows=3, shingle_size=2, seed=1):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm=bands * rows, seed=seed)
+        self.comparisons = 0  # candidate checks in the last group() call
+
+    def signature(self, title):
+        return self.hasher.signature(shingles(title, self.shingle_size))
+
+    def group(self, articles, key='title'):
+        """Same output shape as group_articles: list of groups, leader first."""
+        titles = [a[key] for a in articles]
+        buckets = {}
+        keys_per_item = []
+        for idx, title in enumerate(titles):
+            keys = band_keys(self.signature(title), self.bands, self.rows)
+            keys_per_item.append(keys)
+            for k in keys:
+                buckets.setdefault(k, []).append(idx)
+
+        self.comparisons = 0
+        processed = set()
+        groups = []
+        for i, article in enumerate(articles):
+            if i in processed:
+                continue
+            processed.add(i)
+            current_group = [article]
+
+            candidates = set()
+            for k in keys_per_item[i]:
+                candidates.update(j for j in buckets[k] if j > i)
+            for j in sorted(candidates):
+                if j in processed:
+                    continue
+                self.comparisons += 1
+                if title_ratio(titles[i], titles[j]) > self.threshold:
+                    current_group.append(articles[j])
+                    processed.add(j)
+            groups.append(current_group)
+        return groups
+
+
+@functools.lru_cache(maxsize=8)
+def get_clusterer(threshold=0.6):
+    """Shared clusterer per threshold (hash parameters are built once)."""
+    return MinHashClusterer(threshold=threshold)
+
+
+class StoryClusterer:
+    """Assigns newly ingested articles to persisted story clusters.
+
+    Each new article costs one signature, one bucket lookup and a ratio check
+    against the few matching cluster leaders; nothing is rebuilt. Clusters
+    that receive no article for `window` seconds stop matching and are pruned.
+    """
+
+    def __init__(self, threshold=0.6, window=48 * 3600, prune_every=600):
+        self.minhash = get_clusterer(threshold)
+        self.threshold = threshold
+        self.window = window
+        self.prune_every = prune_every
+        self.last_prune = 0
+        self.lock = threading.Lock()  # one writer, so a story is not opened twice
+
+    def assign(self, articles):
+        """Cluster the not-yet-clustered archived articles; returns how many were assigned."""
+        new_hashes = db.get_unclustered([a.get('link') for a in articles])
+        if not new_hashes:
+            return 0
+        assigned = 0
+        with self.lock:
+            since = time.time() - self.window
+            for article in articles:
+                h = db.url_hash(article['link']) if article.get('link') else None
+                if h not in new_hashes:
+                    continue
+                new_hashes.discard(h)
+                title = article['title']
+                keys = band_keys(self.minhash.signature(title), self.minhash.bands, self.minhash.rows)
+                best_id, best_ratio = None, self.threshold
+                for cluster_id, leader_title in db.find_cluster_candidates(keys, since):
+                    ratio = title_ratio(leader_title, title)
+                    if ratio > best_ratio:
+                        best_id, best_ratio = cluster_id, ratio
+                if best_id is None:
+                    db.create_story_cluster(h, title, keys)
+                else:
+                    db.add_to_story_cluster(best_id, h)
+                assigned += 1
+
+            if time.time() - self.last_prune > self.prune_every:
+                db.prune_story_clusters(since)
+                self.last_prune = time.time()
+        return assigned
+
+
+def group_by_cluster(articles, cluster_ids, threshold=0.6):
+    """Group articles by precomputed cluster id, keeping list order.
+
+    Articles without a cluster id (e.g. live search hits) are grouped with
+    MinHashClusterer instead.
+    """
+    groups = []
+    by_id = {}
+    rest = []
+    for idx, article in enumerate(articles):
+        cluster_id = cluster_ids.get(article['link'])
+        if cluster_id is None:
+            rest.append((idx, article))
+        elif cluster_id in by_id:
+            by_id[cluster_id][1].append(article)
+        else:
+            by_id[cluster_id] = (idx, [article])
+            groups.append(by_id[cluster_id])
+    if rest:
+        positions = {id(a): idx for idx, a in rest}
+        for group in get_clusterer(threshold).group([a for _, a in rest]):
+            groups.append((positions[id(group[0])], group))
+        groups.sort(key=lambda g: g[0])
+    return [g for _, g in groups]
+
+
+_story_clusterer = None
+_story_lock = threading.Lock()
+
+
+def get_story_clusterer():
+    """Process-wide StoryClusterer."""
+    global _story_clusterer
+    if _story_clusterer is None:
+        with _story_lock:
+            if _story_clusterer is None:
+                _story_clusterer = StoryClusterer()
+    return _story_clusterer
@@ -1,17 +1,118 @@
 import sqlite3
+import collections
 import hashlib
 import json
 import os
 import random
 import string
+import threading
 import time
+import re
+import unicodedata
+
+from models import Article, format_published, url_hash  # noqa: F401 (re-exported as db.*)
 
 DB_FILE = "news_app_v2.db"
 SESSION_TIMEOUT = 48 * 60 * 60  # 48 hours in seconds
 
+# --- Connection Pool ---
+# Process-wide pool of open connections. A thread borrows one on its first
+# get_conn() and keeps it while it runs; when the thread ends (Streamlit starts
+# a new script thread on every rerun) the connection goes back to the pool, so
+# the next thread skips connect + PRAGMAs. check_same_thread=False lets a
+# connection move between threads; only one thread holds it at a time.
+# WAL lets readers run while a writer commits; synchronous=NORMAL is durable
+# against app crashes in WAL mode.
+CACHE_SIZE_KB = 16 * 1024     # page cache per connection
+STATEMENT_CACHE = 256         # prepared statements kept per connection
+BUSY_TIMEOUT_MS = 5000        # wait this long for a writer instead of failing
+POOL_SIZE = int(os.environ.get("AINEWS_DB_POOL_SIZE", 8))  # idle connections kept open
+
+_local = threading.local()
+_idle = collections.deque()  # (path, connection), most recently returned last
+_pool_lock = threading.Lock()
+pool_stats = {'opened': 0, 'reused': 0}
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=STATEMENT_CACHE,
+                           check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+def _acquire(path):
+    with _pool_lock:
+        while _idle:
+            idle_path, conn = _idle.pop()
+            if idle_path == path:
+                pool_stats['reused'] += 1
+                return conn
+            conn.close()
+        pool_stats['opened'] += 1
+    return _connect(path)
+
+def _release(conn, path):
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        with _pool_lock:
+            if path == DB_FILE and len(_idle) < POOL_SIZE:
+                _idle.append((path, conn))
+                return
+        conn.close()
+    except Exception:
+        pass  # interpreter shutdown or a broken connection: nothing to keep
+
+class _Lease:
+    """A pooled connection lent to one thread; returned when the thread's locals are dropped."""
+    __slots__ = ('conn', 'path')
+
+    def __init__(self, conn, path):
+        self.conn = conn
+        self.path = path
+
+    def __del__(self):
+        _release(self.conn, self.path)
+
+def get_conn():
+    """This thread's connection to DB_FILE (borrowed from the pool on first use)."""
+    lease = getattr(_local, 'lease', None)
+    if lease is None or lease.path != DB_FILE:
+        _local.lease = None
+        lease = _local.lease = _Lease(_acquire(DB_FILE), DB_FILE)
+    elif lease.conn.in_transaction:
+        # Every function commits before returning, so an open transaction
+        # here was left by a call that raised; discard it.
+        lease.conn.rollback()
+    return lease.conn
+
+def close_conn():
+    """Give this thread's connection back to the pool now instead of at thread exit."""
+    _local.lease = None
+
+def close_pool():
+    """Close every idle pooled connection."""
+    with _pool_lock:
+        while _idle:
+            _idle.pop()[1].close()
+
+_initialized = set()  # DB_FILE paths init_db has run on in this process
+_init_lock = threading.Lock()
+
+def ensure_db():
+    """Run init_db once per process (app.py calls this on every rerun)."""
+    if DB_FILE in _initialized:
+        return
+    with _init_lock:
+        if DB_FILE not in _initialized:
+            init_db()
+            _initialized.add(DB_FILE)
+
 def init_db():
     """Initialize the database tables."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     
     # Users table
@@ -59,6 +160,7 @@ def init_db():
         c.execute("ALTER TABLE users ADD COLUMN auth_code TEXT")
     except sqlite3.OperationalError:
         pass
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sessions_ip_expires ON persistent_sessions (ip_address, expires_at)")
 
     # Read History Table
     c.execute('''
@@ -71,8 +173,142 @@ def init_db():
         )
     ''')
 
+    # Read tracking: read_at = last click (NULL if only ever shown), impressions = times shown
+    for column in ("impressions INTEGER NOT NULL DEFAULT 0", "last_seen REAL"):
+        try:
+            c.execute(f"ALTER TABLE read_history ADD COLUMN {column}")
+        except sqlite3.OperationalError:
+            pass
+    c.execute("CREATE INDEX IF NOT EXISTS idx_read_history_read_at ON read_history (email, read_at)")
+
+    # Bookmarks (one row per saved article; article = JSON of the article dict)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS bookmarks (
+            email TEXT NOT NULL,
+            url_hash INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            source TEXT,
+            article TEXT NOT NULL,
+            saved_at REAL NOT NULL,
+            PRIMARY KEY (email, url_hash),
+            FOREIGN KEY (email) REFERENCES users (email)
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_saved ON bookmarks (email, saved_at, url_hash)")
+    # Migrate the old JSON list under user_data 'bookmarks' (list order = save order)
+    c.execute("SELECT email, value FROM user_data WHERE key = 'bookmarks'")
+    legacy = c.fetchall()
+    if legacy:
+        for email, value in legacy:
+            items = [a for a in json.loads(value or "[]") if a.get('link')]
+            base = time.time() - len(items)
+            c.executemany("INSERT OR IGNORE INTO bookmarks (email, url_hash, url, source, article, saved_at) VALUES (?, ?, ?, ?, ?, ?)",
+                          [_bookmark_row(email, a, base + i) for i, a in enumerate(items)])
+        c.execute("DELETE FROM user_data WHERE key = 'bookmarks'")
+        invalidate_user_profile()
+
+    # og:image cache (image = '' records a miss; see og_images.py for TTLs)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS og_images (
+            url_hash INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            image TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_og_images_fetched ON og_images (fetched_at)")
+
+    # Thumbnail proxy index (file = content-addressed name under static/thumbs)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS thumbnails (
+            url_hash INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            file TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_thumbnails_file ON thumbnails (file)")
+
+    # Feed Cache Table (conditional GET validators + last parsed result)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS feed_cache (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            articles TEXT,
+            body_size INTEGER,
+            fetched_at REAL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_feed_cache_fetched ON feed_cache (fetched_at)")
+
+    # Article Archive Table (url_hash = signed 64-bit hash of the URL)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS articles (
+            url_hash INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            source TEXT,
+            category TEXT,
+            title TEXT,
+            summary TEXT,
+            image TEXT,
+            published INTEGER NOT NULL,
+            first_seen REAL NOT NULL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_source_published ON articles (source, published)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published)")
+
+    # Story clusters (incremental near-duplicate grouping, see clustering.StoryClusterer)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS story_clusters (
+            cluster_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            leader_hash INTEGER NOT NULL,
+            leader_title TEXT NOT NULL,
+            size INTEGER NOT NULL DEFAULT 1,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    # LSH band buckets of each cluster leader's MinHash signature
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS cluster_bands (
+            band INTEGER NOT NULL,
+            bucket BLOB NOT NULL,
+            cluster_id INTEGER NOT NULL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_cluster_bands_bucket ON cluster_bands (band, bucket)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_cluster_bands_cluster ON cluster_bands (cluster_id)")
+    try:
+        c.execute("ALTER TABLE articles ADD COLUMN cluster_id INTEGER")
+    except sqlite3.OperationalError:
+        pass
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_cluster ON articles (cluster_id)")
+
+    # Full-text index over the archive (rowid = articles.url_hash).
+    # Text is stored pre-split into character bigrams so Japanese matches
+    # without word segmentation; see ngram_text(). user_version records the
+    # tokenization the index was built with; older indexes are rebuilt.
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'")
+    fts_exists = c.fetchone() is not None
+    c.execute("PRAGMA user_version")
+    fts_version = c.fetchone()[0]
+    c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(title, summary)")
+    if not fts_exists or fts_version < FTS_TOKENS_VERSION:
+        if fts_exists:
+            c.execute("DELETE FROM articles_fts")
+        else:
+            # Default rank: BM25 with titles weighted 10x over summaries
+            c.execute("INSERT INTO articles_fts (articles_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+        c.execute(f"PRAGMA user_version = {FTS_TOKENS_VERSION}")
+        c.execute("SELECT url_hash, title, summary FROM articles")
+        c.executemany("INSERT INTO articles_fts (rowid, title, summary) VALUES (?, ?, ?)",
+                      [(h, ngram_text(t), ngram_text(s)) for h, t, s in c.fetchall()])
+
     conn.commit()
-    conn.close()
 
 # --- User Management ---
 def hash_password(password):
@@ -81,7 +317,7 @@ def hash_password(password):
 
 def create_user(email, password):
     """Register a new user with email."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     try:
         # Generate a random base32-like string as a mock 2FA secret (for future use/display)
@@ -92,18 +328,16 @@ def create_user(email, password):
         conn.commit()
         return secret 
     except sqlite3.IntegrityError:
+        conn.rollback()
         return None 
-    finally:
-        conn.close()
 
 def ensure_user_exists(email):
     """Checks if user exists, creates if not. Returns the 2FA secret."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("SELECT two_factor_secret FROM users WHERE email = ?", (email,))
     row = c.fetchone()
     if row:
-        conn.close()
         return row[0]
     else:
         # Create new user with dummy password
@@ -112,16 +346,14 @@ def ensure_user_exists(email):
         c.execute("INSERT INTO users (email, password_hash, two_factor_secret) VALUES (?, ?, ?)", 
                   (email, hash_password("magic_password_placeholder"), secret))
         conn.commit()
-        conn.close()
         return secret
 
 def verify_user(email, password):
     """Verify login credentials. Returns 2FA secret if valid, None otherwise."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("SELECT password_hash, two_factor_secret FROM users WHERE email = ?", (email,))
     row = c.fetchone()
-    conn.close()
     
     if row and row[0] == hash_password(password):
         return row[1] 
@@ -129,11 +361,10 @@ def verify_user(email, password):
 
 def verify_2fa(email, code):
     """Verify 2FA auth code."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("SELECT auth_code FROM users WHERE email = ?", (email,))
     row = c.fetchone()
-    conn.close()
     
     if row and row[0] == code:
         return True 
@@ -142,32 +373,29 @@ def verify_2fa(email, code):
 def set_auth_code(email):
     """Generate and save a random 6-digit auth code."""
     code = ''.join(random.choices(string.digits, k=6))
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("UPDATE users SET auth_code = ? WHERE email = ?", (code, email))
     updated = c.rowcount > 0
     conn.commit()
-    conn.close()
     return code if updated else None
 
 def set_recovery_code(email):
     """Generate and save a recovery code."""
     code = ''.join(random.choices(string.digits, k=6))
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("UPDATE users SET recovery_code = ? WHERE email = ?", (code, email))
     updated = c.rowcount > 0
     conn.commit()
-    conn.close()
     return code if updated else None
 
 def verify_recovery_code(email, code):
     """Verify recovery code."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("SELECT recovery_code FROM users WHERE email = ?", (email,))
     row = c.fetchone()
-    conn.close()
     
     if row and row[0] == code:
         return True
@@ -175,63 +403,229 @@ def verify_recovery_code(email, code):
 
 def update_password(email, new_password):
     """Update password and clear recovery code."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("UPDATE users SET password_hash = ?, recovery_code = NULL WHERE email = ?", 
               (hash_password(new_password), email))
     conn.commit()
-    conn.close()
 
 def save_user_data(email, key, value):
-    """Save user specific data."""
-    conn = sqlite3.connect(DB_FILE)
+    """Save user specific data (written through to the profile cache)."""
+    conn = get_conn()
     c = conn.cursor()
     json_val = json.dumps(value)
     c.execute("INSERT OR REPLACE INTO user_data (email, key, value) VALUES (?, ?, ?)",
               (email, key, json_val))
     conn.commit()
-    conn.close()
+    with _profile_lock:
+        profile = _profile_cache.get(email)
+        if profile is not None:
+            profile[key] = json_val
 
 def load_user_data(email, key, default=None):
     """Load user specific data."""
-    conn = sqlite3.connect(DB_FILE)
+    return load_user_profile(email).get(key, default)
+
+# --- Profile Cache ---
+# email -> {key: JSON text}. Filled by one query per user and kept current by
+# save_user_data, so settings reads on a rerun do no DB I/O. Values are kept
+# as JSON and decoded per call so callers can mutate what they get back.
+PROFILE_CACHE_SIZE = 1024
+
+_profile_cache = collections.OrderedDict()
+_profile_lock = threading.Lock()
+
+def load_user_profile(email):
+    """All of a user's saved keys, decoded: {key: value}."""
+    with _profile_lock:
+        profile = _profile_cache.get(email)
+        if profile is None:
+            c = get_conn().cursor()
+            c.execute("SELECT key, value FROM user_data WHERE email = ?", (email,))
+            profile = dict(c.fetchall())
+            _profile_cache[email] = profile
+            if len(_profile_cache) > PROFILE_CACHE_SIZE:
+                _profile_cache.popitem(last=False)
+        else:
+            _profile_cache.move_to_end(email)
+        raw = dict(profile)
+    return {key: json.loads(value) for key, value in raw.items()}
+
+def invalidate_user_profile(email=None):
+    """Drop one user's cached profile (or all of them)."""
+    with _profile_lock:
+        if email is None:
+            _profile_cache.clear()
+        else:
+            _profile_cache.pop(email, None)
+
+# --- Bookmarks ---
+def _bookmark_row(email, article, saved_at):
+    return (email, url_hash(article['link']), article['link'], article.get('source'),
+            json.dumps(dict(article), ensure_ascii=False), saved_at)
+
+def add_bookmark(email, article):
+    """Save one article; returns False if it was already saved."""
+    conn = get_conn()
     c = conn.cursor()
-    c.execute("SELECT value FROM user_data WHERE email = ? AND key = ?", (email, key))
-    row = c.fetchone()
-    conn.close()
-    
-    if row:
-        return json.loads(row[0])
-    return default
+    c.execute("INSERT OR IGNORE INTO bookmarks (email, url_hash, url, source, article, saved_at) VALUES (?, ?, ?, ?, ?, ?)",
+              _bookmark_row(email, article, time.time()))
+    added = c.rowcount > 0
+    conn.commit()
+    return added
+
+def remove_bookmark(email, link):
+    """Delete one saved article; returns False if it was not saved."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("DELETE FROM bookmarks WHERE email = ? AND url_hash = ?", (email, url_hash(link)))
+    removed = c.rowcount > 0
+    conn.commit()
+    return removed
+
+def get_bookmark_links(email):
+    """Set of saved article URLs, for membership checks."""
+    c = get_conn().cursor()
+    c.execute("SELECT url FROM bookmarks WHERE email = ?", (email,))
+    return {r[0] for r in c.fetchall()}
+
+def get_bookmarks_page(email, source=None, cursor=None, limit=50):
+    """Saved articles in save order, keyset-paginated.
+
+    cursor is the (saved_at, url_hash) of the last row of the previous page.
+    Returns (articles, next_cursor); next_cursor is None on the last page.
+    """
+    where = ["email = ?"]
+    params = [email]
+    if source:
+        where.append("source = ?")
+        params.append(source)
+    if cursor:
+        where.append("(saved_at, url_hash) > (?, ?)")
+        params.extend(cursor)
+    params.append(limit)
+    c = get_conn().cursor()
+    c.execute(f"""
+        SELECT article, saved_at, url_hash FROM bookmarks
+        WHERE {' AND '.join(where)}
+        ORDER BY saved_at, url_hash LIMIT ?
+    """, params)
+    rows = c.fetchall()
+    articles = [Article.from_dict(json.loads(r[0])) for r in rows]
+    next_cursor = (rows[-1][1], rows[-1][2]) if len(rows) == limit else None
+    return articles, next_cursor
+
+# --- Read History ---
+def record_reads(clicks, impressions):
+    """Batch-write read events.
+
+    clicks: [(email, url, ts)]; impressions: [(email, url, count, ts)].
+    """
+    conn = get_conn()
+    c = conn.cursor()
+    c.executemany("""
+        INSERT INTO read_history (email, article_url, read_at, impressions, last_seen)
+        VALUES (?, ?, ?, 0, ?)
+        ON CONFLICT(email, article_url) DO UPDATE SET
+            read_at = excluded.read_at,
+            last_seen = MAX(COALESCE(last_seen, 0), excluded.last_seen)
+    """, [(email, url, ts, ts) for email, url, ts in clicks])
+    c.executemany("""
+        INSERT INTO read_history (email, article_url, read_at, impressions, last_seen)
+        VALUES (?, ?, NULL, ?, ?)
+        ON CONFLICT(email, article_url) DO UPDATE SET
+            impressions = impressions + excluded.impressions,
+            last_seen = MAX(COALESCE(last_seen, 0), excluded.last_seen)
+    """, impressions)
+    conn.commit()
+
+def get_read_urls(email, limit=5000):
+    """URLs the user has opened, newest first (at most `limit`)."""
+    c = get_conn().cursor()
+    c.execute("""
+        SELECT article_url FROM read_history
+        WHERE email = ? AND read_at IS NOT NULL
+        ORDER BY read_at DESC LIMIT ?
+    """, (email, limit))
+    return [r[0] for r in c.fetchall()]
+
+def prune_read_history(before, max_per_user):
+    """Drop events older than `before`, then cap each user at `max_per_user` rows
+    (opened articles are kept before shown-only ones)."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("DELETE FROM read_history WHERE COALESCE(read_at, last_seen, 0) < ?", (before,))
+    removed = c.rowcount
+    c.execute("""
+        DELETE FROM read_history WHERE rowid IN (
+            SELECT rowid FROM (
+                SELECT rowid, ROW_NUMBER() OVER (
+                    PARTITION BY email
+                    ORDER BY read_at IS NULL, COALESCE(read_at, last_seen, 0) DESC
+                ) AS n FROM read_history
+            ) WHERE n > ?
+        )
+    """, (max_per_user,))
+    removed += c.rowcount
+    conn.commit()
+    return removed
 
 # --- Token-based Session Management ---
+# Validated sessions are cached for SESSION_CACHE_TTL seconds, and the sliding
+# expiry is only written once it would move by SESSION_REFRESH_THRESHOLD, so a
+# page load with ?s= is normally a dict lookup, not a write transaction.
+# Expired rows are bulk-deleted by a sweeper thread (see start_session_sweeper).
+SESSION_CACHE_TTL = 60  # seconds
+SESSION_CACHE_SIZE = 4096
+SESSION_REFRESH_THRESHOLD = int(os.environ.get("AINEWS_SESSION_REFRESH", 3600))  # seconds
+SESSION_SWEEP_INTERVAL = 600  # seconds
+
+_session_cache = collections.OrderedDict()  # token -> [email, ip_address, expires_at, cached_at]
+_session_lock = threading.Lock()
+_sweeper = None
+
 def create_persistent_session(email, ip_address):
     """Generate a random 32-char token and save to DB."""
     token = ''.join(random.choices(string.ascii_letters + string.digits, k=32))
     expires_at = time.time() + SESSION_TIMEOUT
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("INSERT INTO persistent_sessions (token, email, ip_address, expires_at) VALUES (?, ?, ?, ?)",
               (token, email, ip_address, expires_at))
     conn.commit()
-    conn.close()
     return token
 
+def _cached_session(token):
+    """Session row from the cache, else from the DB (and cache it)."""
+    now = time.time()
+    with _session_lock:
+        entry = _session_cache.get(token)
+        if entry is not None and now - entry[3] < SESSION_CACHE_TTL:
+            return entry
+    c = get_conn().cursor()
+    c.execute("SELECT email, ip_address, expires_at FROM persistent_sessions WHERE token = ?", (token,))
+    row = c.fetchone()
+    with _session_lock:
+        if row is None:
+            _session_cache.pop(token, None)
+            return None
+        entry = _session_cache[token] = [row[0], row[1], row[2], now]
+        _session_cache.move_to_end(token)
+        if len(_session_cache) > SESSION_CACHE_SIZE:
+            _session_cache.popitem(last=False)
+        return entry
+
 def verify_persistent_session(token, ip_address):
     """Check if token is valid, not expired, and IP matches (loosely). Returns email if OK, else reason string."""
     if not token: return "NO_TOKEN_GIVEN"
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT email, ip_address, expires_at FROM persistent_sessions WHERE token = ?", (token,))
-    row = c.fetchone()
+    row = _cached_session(token)
     
     if row:
-        email, stored_ip, expires_at = row
-        # Check Expiry
+        email, stored_ip, expires_at, _ = row
+        # Check Expiry (the row itself is removed by the sweeper)
         if time.time() > expires_at:
-            c.execute("DELETE FROM persistent_sessions WHERE token = ?",(token,))
-            conn.commit()
-            conn.close()
+            with _session_lock:
+                _session_cache.pop(token, None)
             return "EXPIRED"
             
         # Check IP (Loosened: Check first two octets if possible)
@@ -245,39 +639,441 @@ def verify_persistent_session(token, ip_address):
             stored_sub = get_subnet(stored_ip)
             current_sub = get_subnet(ip_address)
             if stored_sub != current_sub:
-                conn.close()
                 return f"IP_MISMATCH:stored={stored_ip}"
             
-        # Success! Update activity
+        # Success! Slide the expiry, but only write when it has moved enough
         new_expires = time.time() + SESSION_TIMEOUT
-        c.execute("UPDATE persistent_sessions SET expires_at = ? WHERE token = ?", (new_expires, token))
-        conn.commit()
-        conn.close()
+        if new_expires - expires_at > SESSION_REFRESH_THRESHOLD:
+            conn = get_conn()
+            conn.execute("UPDATE persistent_sessions SET expires_at = ? WHERE token = ?", (new_expires, token))
+            conn.commit()
+            with _session_lock:
+                row[2] = new_expires
         return email
         
-    conn.close()
     return "TOKEN_NOT_FOUND"
 
 def delete_persistent_session(token):
     """Remove a session token on logout."""
     if not token: return
-    conn = sqlite3.connect(DB_FILE)
+    with _session_lock:
+        _session_cache.pop(token, None)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("DELETE FROM persistent_sessions WHERE token = ?", (token,))
     conn.commit()
-    conn.close()
 
 def get_latest_session_by_ip(ip_address):
     """Find the most recent valid session for this IP."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     # Check for sessions within the same subnet (Loosened)
-    # We'll just look for exact or recent matches for simplicity in this helper
+    # Prefix match written as a range so it can use idx_sessions_ip_expires
+    prefix = '.'.join(ip_address.split('.')[:2])
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else '\uffff'
     c.execute("""
         SELECT email, token FROM persistent_sessions 
-        WHERE expires_at > ? AND ip_address LIKE ?
+        WHERE ip_address >= ? AND ip_address < ? AND expires_at > ?
         ORDER BY expires_at DESC LIMIT 1
-    """, (time.time(), f"{'.'.join(ip_address.split('.')[:2])}%"))
+    """, (prefix, upper, time.time()))
     row = c.fetchone()
-    conn.close()
     return row # (email, token) or None
+
+def sweep_expired_sessions():
+    """Bulk-delete expired session rows; returns how many were removed."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("DELETE FROM persistent_sessions WHERE expires_at < ?", (time.time(),))
+    removed = c.rowcount
+    conn.commit()
+    return removed
+
+def start_session_sweeper(interval=SESSION_SWEEP_INTERVAL):
+    """Run the periodic sweeps (expired sessions, stale feed_cache and og_images
+    rows) every `interval` seconds in a daemon thread (once per process)."""
+    global _sweeper
+    with _session_lock:
+        if _sweeper is not None:
+            return
+        def run():
+            while True:
+                for sweep in (sweep_expired_sessions, sweep_feed_cache, sweep_og_images):
+                    try:
+                        sweep()
+                    except sqlite3.Error as e:
+                        print(f"{sweep.__name__} failed: {e}")
+                time.sleep(interval)
+        _sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        _sweeper.start()
+
+# --- Feed Cache (ETag / Last-Modified) ---
+# Live searches go through the feed cache too, so every distinct query URL
+# gets a row; rows not fetched or revalidated for FEED_CACHE_RETENTION are
+# deleted by the sweeper. Scheduled headline feeds are refreshed long before.
+FEED_CACHE_RETENTION = 7 * 24 * 3600  # seconds
+
+def load_feed_cache(url):
+    """Load stored validators and parsed articles for a feed URL."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("SELECT etag, last_modified, articles, body_size, fetched_at FROM feed_cache WHERE url = ?", (url,))
+    row = c.fetchone()
+
+    if row:
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'articles': [Article.from_dict(a) for a in json.loads(row[2])] if row[2] else [],
+            'body_size': row[3],
+            'fetched_at': row[4]
+        }
+    return None
+
+def save_feed_cache(url, etag, last_modified, articles, body_size):
+    """Store validators and the parsed result of a full (200) fetch."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("""
+        INSERT OR REPLACE INTO feed_cache (url, etag, last_modified, articles, body_size, fetched_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (url, etag, last_modified, json.dumps([dict(a) for a in articles], ensure_ascii=False),
+          body_size, time.time()))
+    conn.commit()
+
+def touch_feed_cache(url):
+    """Mark a feed as revalidated (304) without rewriting its articles."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("UPDATE feed_cache SET fetched_at = ? WHERE url = ?", (time.time(), url))
+    conn.commit()
+
+def sweep_feed_cache(before=None):
+    """Delete feed_cache rows last fetched before `before` (default: the
+    retention cutoff); returns how many were removed."""
+    if before is None:
+        before = time.time() - FEED_CACHE_RETENTION
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("DELETE FROM feed_cache WHERE fetched_at < ?", (before,))
+    removed = c.rowcount
+    conn.commit()
+    return removed
+
+# --- og:image Cache ---
+# Entries are served for OG_IMAGE_HIT_TTL (found) / OG_IMAGE_MISS_TTL (no
+# og:image) seconds, see og_images.py; the sweeper deletes them after that.
+OG_IMAGE_HIT_TTL = 7 * 24 * 3600
+OG_IMAGE_MISS_TTL = 6 * 3600
+
+def load_og_images(urls):
+    """Cached lookups: {url: (image, fetched_at)} for the URLs that have a row."""
+    by_hash = {url_hash(u): u for u in urls if u and u != "#"}
+    if not by_hash:
+        return {}
+    hashes = list(by_hash)
+    c = get_conn().cursor()
+    result = {}
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        c.execute(f"SELECT url_hash, image, fetched_at FROM og_images WHERE url_hash IN ({','.join('?' * len(chunk))})", chunk)
+        for h, image, fetched_at in c.fetchall():
+            result[by_hash[h]] = (image, fetched_at)
+    return result
+
+def sweep_og_images(now=None):
+    """Delete og_images rows past their TTL; returns how many were removed."""
+    now = time.time() if now is None else now
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("DELETE FROM og_images WHERE fetched_at < ? OR (image = '' AND fetched_at < ?)",
+              (now - OG_IMAGE_HIT_TTL, now - OG_IMAGE_MISS_TTL))
+    removed = c.rowcount
+    conn.commit()
+    return removed
+
+def save_og_images(images):
+    """Store {url: image} lookups ('' = miss) and fill in archived articles without an image."""
+    if not images:
+        return
+    now = time.time()
+    rows = [(url_hash(u), u, image or "", now) for u, image in images.items()]
+    conn = get_conn()
+    c = conn.cursor()
+    c.executemany("INSERT OR REPLACE INTO og_images (url_hash, url, image, fetched_at) VALUES (?, ?, ?, ?)", rows)
+    c.executemany("UPDATE articles SET image = ? WHERE url_hash = ? AND (image IS NULL OR image = '')",
+                  [(image, h) for h, _, image, _ in rows if image])
+    conn.commit()
+
+# --- Thumbnails ---
+def load_thumbnails(urls):
+    """{url: (file, last_access)} for image URLs that have a thumbnail."""
+    by_hash = {url_hash(u): u for u in urls if u}
+    if not by_hash:
+        return {}
+    hashes = list(by_hash)
+    c = get_conn().cursor()
+    result = {}
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        c.execute(f"SELECT url_hash, file, last_access FROM thumbnails WHERE url_hash IN ({','.join('?' * len(chunk))})", chunk)
+        for h, file, last_access in c.fetchall():
+            result[by_hash[h]] = (file, last_access)
+    return result
+
+def save_thumbnail(url, file, size):
+    now = time.time()
+    conn = get_conn()
+    conn.execute("INSERT OR REPLACE INTO thumbnails (url_hash, url, file, bytes, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                 (url_hash(url), url, file, size, now, now))
+    conn.commit()
+
+def touch_thumbnails(urls):
+    conn = get_conn()
+    conn.executemany("UPDATE thumbnails SET last_access = ? WHERE url_hash = ?",
+                     [(time.time(), url_hash(u)) for u in urls])
+    conn.commit()
+
+def evict_thumbnails(max_bytes):
+    """Drop least recently used thumbnail files until their total size fits
+    max_bytes; returns the file names to delete from disk."""
+    conn = get_conn()
+    c = conn.cursor()
+    # Several URLs can share one file (same image bytes): size and recency are per file
+    c.execute("SELECT file, MAX(bytes), MAX(last_access) FROM thumbnails GROUP BY file ORDER BY 3")
+    files = c.fetchall()
+    total = sum(size for _, size, _ in files)
+    evicted = []
+    for file, size, _ in files:
+        if total <= max_bytes:
+            break
+        evicted.append(file)
+        total -= size
+    if evicted:
+        c.executemany("DELETE FROM thumbnails WHERE file = ?", [(f,) for f in evicted])
+        conn.commit()
+    return evicted
+
+# --- Article Archive ---
+_RUN_RE = re.compile(r'[a-z0-9]+|[^\W_a-z0-9]+')
+FTS_TOKENS_VERSION = 2  # bump when ngram_tokens changes; init_db re-indexes
+
+def ngram_tokens(text, run_ends=True):
+    """ASCII words stay whole, other runs (Japanese) become character bigrams.
+
+    With run_ends, a multi-character run also yields its last character, so
+    a one-character search finds characters that end a run (雨 in 大雨).
+    """
+    tokens = []
+    if not text:
+        return tokens
+    for run in _RUN_RE.findall(unicodedata.normalize('NFKC', text).lower()):
+        if run.isascii() or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            if run_ends:
+                tokens.append(run[-1])
+    return tokens
+
+def ngram_text(text):
+    return ' '.join(ngram_tokens(text))
+
+def fts_query(query):
+    """Build an FTS5 MATCH expression that requires every term.
+
+    Japanese terms match as substrings. ASCII words match as word prefixes:
+    "pyth" finds "python", "thon" does not.
+    """
+    parts = []
+    for term in query.split():
+        runs = _RUN_RE.findall(unicodedata.normalize('NFKC', term).lower())
+        if not runs:
+            continue
+        # Runs inside the term are whole runs in the text too, so their end
+        # token is part of the phrase; the last run may continue in the text
+        tokens = []
+        for i, run in enumerate(runs):
+            tokens.extend(ngram_tokens(run, run_ends=i < len(runs) - 1))
+        prefix = runs[-1].isascii() or len(runs[-1]) == 1
+        parts.append('"' + ' '.join(tokens) + '"' + ('*' if prefix else ''))
+    return ' AND '.join(parts)
+
+def upsert_articles(articles, category=None):
+    """Bulk insert/update article dicts; first_seen is kept from the first insert."""
+    now = time.time()
+    rows = []
+    for a in articles:
+        link = a.get('link')
+        if not link or link == "#":
+            continue
+        rows.append((
+            url_hash(link), link, a.get('source'), a.get('category', category),
+            a.get('title'), a.get('summary'), a.get('img_src'),
+            int(a.get('published_ts') or now), now
+        ))
+    if not rows:
+        return 0
+
+    conn = get_conn()
+    c = conn.cursor()
+    c.executemany("""
+        INSERT INTO articles (url_hash, url, source, category, title, summary, image, published, first_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(url_hash) DO UPDATE SET
+            title = excluded.title,
+            summary = excluded.summary,
+            image = COALESCE(NULLIF(excluded.image, ''), articles.image),
+            category = COALESCE(articles.category, excluded.category)
+    """, rows)
+    # Keep the full-text index in step (delete + insert handles updated titles)
+    c.executemany("DELETE FROM articles_fts WHERE rowid = ?", [(r[0],) for r in rows])
+    c.executemany("INSERT INTO articles_fts (rowid, title, summary) VALUES (?, ?, ?)",
+                  [(r[0], ngram_text(r[4]), ngram_text(r[5])) for r in rows])
+    conn.commit()
+    return len(rows)
+
+def _article_from_row(row):
+    h, link, source, category, title, summary, image, published = row
+    return Article(title, link, summary or "", image or "", source, category, published, _hash=h)
+
+def get_articles_page(source=None, cursor=None, limit=50, since=None):
+    """Newest-first keyset page of archived articles.
+
+    cursor is the (published, url_hash) of the last row of the previous page;
+    since (epoch) keeps only articles published at or after it.
+    Returns (articles, next_cursor); next_cursor is None on the last page.
+    """
+    where = []
+    params = []
+    if source:
+        where.append("source = ?")
+        params.append(source)
+    if since:
+        where.append("published >= ?")
+        params.append(int(since))
+    if cursor:
+        where.append("(published, url_hash) < (?, ?)")
+        params.extend(cursor)
+    sql = "SELECT url_hash, url, source, category, title, summary, image, published FROM articles"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY published DESC, url_hash DESC LIMIT ?"
+    params.append(limit)
+
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute(sql, params)
+    rows = c.fetchall()
+
+    articles = [_article_from_row(r) for r in rows]
+    next_cursor = (rows[-1][7], rows[-1][0]) if len(rows) == limit else None
+    return articles, next_cursor
+
+def search_articles(query, limit=50, since=None):
+    """BM25-ranked full-text search over the archive (title weighted 10x).
+
+    since (epoch) restricts matches to articles published at or after it.
+    """
+    match = fts_query(query or "")
+    if not match:
+        return []
+    conn = get_conn()
+    c = conn.cursor()
+    # Rank inside the FTS table first, then join only the top rows; the date
+    # range is applied before the LIMIT through idx_articles_published
+    date_range = ""
+    params = [match]
+    if since:
+        date_range = "AND rowid IN (SELECT url_hash FROM articles WHERE published >= ?)"
+        params.append(int(since))
+    params.append(limit)
+    c.execute(f"""
+        SELECT a.url_hash, a.url, a.source, a.category, a.title, a.summary, a.image, a.published
+        FROM (
+            SELECT rowid, rank FROM articles_fts
+            WHERE articles_fts MATCH ? {date_range}
+            ORDER BY rank LIMIT ?
+        ) f JOIN articles a ON a.url_hash = f.rowid
+        ORDER BY f.rank
+    """, params)
+    rows = c.fetchall()
+    return [_article_from_row(r) for r in rows]
+
+# --- Story Clusters ---
+def get_unclustered(links):
+    """url_hashes of archived articles (by link) that have no cluster yet."""
+    hashes = [url_hash(l) for l in links if l and l != "#"]
+    if not hashes:
+        return set()
+    conn = get_conn()
+    c = conn.cursor()
+    result = set()
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        c.execute(f"SELECT url_hash FROM articles WHERE cluster_id IS NULL AND url_hash IN ({','.join('?' * len(chunk))})", chunk)
+        result.update(r[0] for r in c.fetchall())
+    return result
+
+def find_cluster_candidates(band_keys, since):
+    """Active clusters sharing at least one LSH bucket: [(cluster_id, leader_title)]."""
+    if not band_keys:
+        return []
+    conn = get_conn()
+    c = conn.cursor()
+    where = " OR ".join(["(b.band = ? AND b.bucket = ?)"] * len(band_keys))
+    params = [v for key in band_keys for v in key]
+    c.execute(f"""
+        SELECT DISTINCT s.cluster_id, s.leader_title
+        FROM cluster_bands b JOIN story_clusters s ON s.cluster_id = b.cluster_id
+        WHERE ({where}) AND s.updated_at >= ?
+    """, params + [since])
+    rows = c.fetchall()
+    return rows
+
+def create_story_cluster(leader_hash, leader_title, band_keys):
+    """Open a new cluster led by this article; returns cluster_id."""
+    now = time.time()
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("INSERT INTO story_clusters (leader_hash, leader_title, created_at, updated_at) VALUES (?, ?, ?, ?)",
+              (leader_hash, leader_title, now, now))
+    cluster_id = c.lastrowid
+    c.executemany("INSERT INTO cluster_bands (band, bucket, cluster_id) VALUES (?, ?, ?)",
+                  [(band, bucket, cluster_id) for band, bucket in band_keys])
+    c.execute("UPDATE articles SET cluster_id = ? WHERE url_hash = ?", (cluster_id, leader_hash))
+    conn.commit()
+    return cluster_id
+
+def add_to_story_cluster(cluster_id, article_hash):
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("UPDATE articles SET cluster_id = ? WHERE url_hash = ?", (cluster_id, article_hash))
+    c.execute("UPDATE story_clusters SET size = size + 1, updated_at = ? WHERE cluster_id = ?",
+              (time.time(), cluster_id))
+    conn.commit()
+
+def get_article_clusters(links):
+    """Map link -> cluster_id for archived, clustered articles."""
+    by_hash = {url_hash(l): l for l in links if l and l != "#"}
+    if not by_hash:
+        return {}
+    hashes = list(by_hash)
+    conn = get_conn()
+    c = conn.cursor()
+    result = {}
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        c.execute(f"SELECT url_hash, cluster_id FROM articles WHERE cluster_id IS NOT NULL AND url_hash IN ({','.join('?' * len(chunk))})", chunk)
+        for h, cluster_id in c.fetchall():
+            result[by_hash[h]] = cluster_id
+    return result
+
+def prune_story_clusters(before):
+    """Drop clusters (and their buckets) not updated since `before`."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("DELETE FROM cluster_bands WHERE cluster_id IN (SELECT cluster_id FROM story_clusters WHERE updated_at < ?)", (before,))
+    c.execute("DELETE FROM story_clusters WHERE updated_at < ?", (before,))
+    removed = c.rowcount
+    conn.commit()
+    return removed
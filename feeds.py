@@ -0,0 +1,335 @@
+import calendar
+import html
+import re
+import threading
+import time
+from urllib.parse import quote
+
+import feedparser
+
+import database as db
+import fastfeed
+import http_client
+import source_health
+from models import Article
+from singleflight import SingleFlight
+
+# --- Sources & Categories (label -> category code) ---
+SOURCE_CATEGORIES = {
+    "Bing News": {
+        "トップ": "HEADLINES", "ビジネス": "Business", "テクノロジー": "Technology",
+        "エンタメ": "Entertainment", "政治": "Politics", "科学": "Science",
+        "健康": "Health", "スポーツ": "Sports", "国際": "World", "国内": "Japan"
+    },
+    "Yahoo! ニュース": {
+        "主要": "HEADLINES", "IT・科学": "TECHNOLOGY", "経済": "BUSINESS", "国際": "International",
+        "エンタメ": "Entertainment", "スポーツ": "Sports", "国内": "Domestic", "ライフ": "Life",
+        "地域": "Local"
+    },
+    "ライブドアニュース": {"トップ": "HEADLINES"},
+    "NHK ニュース": {
+        "主要": "HEADLINES", "社会": "Social", "政治": "Politics", "国際": "International",
+        "経済": "Economy", "科学・文化": "Science", "スポーツ": "Sports", "地域": "Local"
+    },
+    "Google News": {
+        "トップ": "HEADLINES", "テクノロジー": "TECHNOLOGY", "ビジネス": "BUSINESS", "国際": "International",
+        "エンタメ": "Entertainment", "スポーツ": "Sports", "科学": "Science", "健康": "Health"
+    },
+    "Gigazine": {"トップ": "HEADLINES"},
+    "ITmedia": {
+        "総合": "ALL", "モバイル": "MOBILE", "エンタープライズ": "ENTERPRISE",
+        "PC USER": "PCUSER", "ビジネスオンライン": "BUSINESS"
+    },
+    "CNET Japan": {"トップ": "HEADLINES"},
+    "TechCrunch Japan": {"トップ": "HEADLINES"},
+    "Qiita": {"トレンド": "HEADLINES"},
+    "Zenn": {"トレンド": "HEADLINES"},
+    "ナタリー": {
+        "音楽": "MUSIC", "映画": "MOVIE", "お笑い": "COMEDY", "コミック": "COMIC"
+    },
+}
+
+# --- Revalidation Counters (process-wide) ---
+_stats_lock = threading.Lock()
+revalidation_stats = {
+    'requests': 0,       # upstream feed requests sent
+    'not_modified': 0,   # refreshes answered with 304
+    'bytes_saved': 0,    # body bytes not downloaded thanks to 304
+    'short_circuited': 0,  # refreshes skipped by an open breaker (stored articles served)
+}
+
+
+def _count(key, amount=1):
+    with _stats_lock:
+        revalidation_stats[key] += amount
+
+
+# --- Parsing Helpers ---
+SUMMARY_MAX_CHARS = 300  # summaries are cut here at parse time (longest card excerpt)
+_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_TAG = re.compile(r'<[^>]*>')
+_IMG_TAG = re.compile(r'''<img\b(?:"[^"]*"|'[^']*'|[^>"'])*>''', re.I)  # '>' may sit inside quoted values
+_IMG_TAG_LOOSE = re.compile(r'<img\b[^>]*>', re.I)  # unbalanced quotes
+_SCRIPT_STYLE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.S | re.I)
+# One attribute per match; a quoted value is consumed with its name, so
+# 'src=' inside another attribute's value is never read as an attribute
+_ATTR = re.compile(r'''([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?''')
+
+def clean_html(raw_html):
+    """Plain text of an HTML fragment: tags stripped, entities decoded, whitespace collapsed."""
+    if not raw_html: return ""
+    if '<' in raw_html:
+        raw_html = _TAG.sub('', _COMMENT.sub('', raw_html))
+    if '&' in raw_html:
+        raw_html = html.unescape(raw_html)
+    return ' '.join(raw_html.split())
+
+def clean_title(raw_title):
+    """Plain text of a feed title: tags (with script / style bodies) stripped, entities decoded.
+
+    Repeated because some feeds escape titles twice; markup that only shows up
+    after decoding is stripped too, so a title never carries HTML.
+    """
+    text = raw_title
+    for _ in range(3):
+        if '<' in text:
+            text = _TAG.sub('', _COMMENT.sub('', _SCRIPT_STYLE.sub('', text)))
+        if '&' not in text:
+            break
+        text = html.unescape(text)
+    return ' '.join(text.split())
+
+def first_img_src(html_content):
+    """src of the first <img> tag ("" if none), read with regexes instead of a DOM."""
+    if '<' not in html_content: return ""
+    if '<!--' in html_content:
+        html_content = _COMMENT.sub('', html_content)
+    tag = _IMG_TAG.search(html_content) or _IMG_TAG_LOOSE.search(html_content)
+    if not tag: return ""
+    for attr in _ATTR.finditer(tag.group(), 4, len(tag.group()) - 1):
+        if attr.group(1).lower() == 'src':
+            value = next((g for g in attr.groups()[1:] if g is not None), None)
+            return html.unescape(value) if value is not None else ""
+    return ""
+
+def parse_summary(html_content, max_chars=SUMMARY_MAX_CHARS):
+    """(plain-text summary cut to max_chars, first image src) for a feed entry.
+
+    The text is unescaped plain text; escape it before putting it into HTML.
+    """
+    if not html_content: return "", ""
+    text = clean_html(html_content)
+    if len(text) > max_chars:
+        text = text[:max_chars - 1].rstrip() + "…"
+    return text, first_img_src(html_content)
+
+def get_high_res_image_url(url):
+    if not url: return ""
+    if "bing.com/th" in url: return f"{url}&w=800&h=450&c=7&rs=1"
+    return url
+
+def _feedparser_entries(content):
+    """Entries via feedparser, in the shape fastfeed.parse() returns."""
+    entries = []
+    for entry in feedparser.parse(content).entries:
+        raw_sum = entry.get('summary', '') or entry.get('description', '') or entry.get('content', [{'value': ''}])[0].get('value', '')
+        img = entry.get('news_image', '') or entry.get('media_thumbnail', [{'url':''}])[0].get('url','')
+        if not img:
+             for enc in entry.get('enclosures', []):
+                if 'image' in enc.get('type', '') or any(ext in enc.get('href', '').lower() for ext in ['.jpg','.jpeg','.png','.webp']):
+                    img = enc.get('href', '')
+                    break
+        entries.append({
+            'title': entry.get('title', 'No Title'), 'link': entry.get('link', '#'),
+            'summary': raw_sum, 'image': img,
+            # dc:date and Atom <updated> land in updated_*; use them when there is no publish date
+            'published': entry.get('published') or entry.get('updated', ''),
+            'published_parsed': entry.get('published_parsed') or entry.get('updated_parsed'),
+        })
+    return entries
+
+def parse_feed(content, source):
+    """Parse a raw RSS/Atom body into Articles (see models.py).
+
+    Known formats go through the fastfeed iterparse path; anything it does
+    not handle is parsed by feedparser instead.
+    """
+    try:
+        entries = fastfeed.parse(content)
+        fastfeed.count('fast')
+    except fastfeed.Unsupported:
+        entries = _feedparser_entries(content)
+        fastfeed.count('fallback')
+
+    processed = []
+    for entry in entries:
+        # Titles are plain text: markup some feeds put in them is stripped, entities decoded
+        title = clean_title(entry['title']) if entry['title'] is not None else 'No Title'
+        link = entry['link']
+        img = entry['image']
+        summary_text, html_img = parse_summary(entry['summary'])
+        if not img: img = html_img
+        # UTC epoch for sorting / filtering (0 when the feed has no usable date,
+        # see fill_undated); article['published'] is formatted from it
+        pub_ts = calendar.timegm(entry['published_parsed']) if entry['published_parsed'] else 0
+
+        processed.append(Article(title, link, summary_text, get_high_res_image_url(img), source,
+                                 published_ts=pub_ts))
+    return processed
+
+def fill_undated(articles, previous=(), now=None):
+    """Give undated articles their first-seen time, carried over from the previous parse."""
+    first_seen = {a['link']: a['published_ts'] for a in previous if a.get('published_ts')}
+    now = int(now or time.time())
+    for article in articles:
+        if not article['published_ts']:
+            article['published_ts'] = first_seen.get(article['link'], now)
+    return articles
+
+# --- Feed URL Resolution ---
+def resolve_feed_url(source, category_code, query_text=""):
+    """Map (source, category, query) to the upstream feed URL ("" if unknown)."""
+    url = ""
+    if source == "Yahoo! ニュース":
+        # Using /categories/ for most to get 50 articles and fix "Life"
+        mapping = {
+            "HEADLINES": "topics/top-picks.xml",
+            "TECHNOLOGY": "categories/it.xml",
+            "BUSINESS": "categories/business.xml",
+            "International": "categories/world.xml",
+            "Entertainment": "categories/entertainment.xml",
+            "Sports": "categories/sports.xml",
+            "Science": "topics/science.xml", # No category for science
+            "Local": "categories/local.xml",
+            "Domestic": "categories/domestic.xml",
+            "Life": "categories/life.xml"
+        }
+        url = f"https://news.yahoo.co.jp/rss/{mapping.get(category_code, 'topics/top-picks.xml')}"
+    elif source == "NHK ニュース":
+        mapping = {
+            "HEADLINES": "cat0.xml", "Social": "cat1.xml", "Politics": "cat4.xml",
+            "International": "cat6.xml", "Economy": "cat5.xml", "Science": "cat3.xml", "Sports": "cat2.xml",
+            "Local": "cat9.xml"
+        }
+        url = f"https://www.nhk.or.jp/rss/news/{mapping.get(category_code, 'cat0.xml')}"
+    elif source == "Bing News":
+        # Map category codes to Japanese search terms
+        bing_map = {
+            "HEADLINES": "トップニュース", "Business": "経済", "Technology": "テクノロジー",
+            "Entertainment": "工ンタメ", "Politics": "政治", "Science": "科学",
+            "Health": "健康", "Sports": "スポーツ", "World": "国際", "Japan": "国内トップ"
+        }
+        # Use query_text if provided (global search), otherwise use category mapping
+        q = query_text if query_text else bing_map.get(category_code, "トップニュース")
+        url = f"https://www.bing.com/news/search?q={quote(q)}&format=rss&cc=JP&setLang=ja-JP"
+    elif source == "Google News":
+        # Mapping standard labels to working Google News Topic IDs
+        g_map = {
+            "HEADLINES": "", 
+            "TECHNOLOGY": "TECHNOLOGY",
+            "BUSINESS": "BUSINESS",
+            "International": "WORLD",
+            "Entertainment": "ENTERTAINMENT",
+            "Sports": "SPORTS",
+            "Science": "SCIENCE",
+            "Health": "HEALTH"
+        }
+        params = "hl=ja&gl=JP&ceid=JP:ja"
+        if category_code == "SEARCH": 
+            url = f"https://news.google.com/rss/search?q={quote(query_text)}&{params}"
+        elif category_code == "HEADLINES": 
+            url = f"https://news.google.com/rss?{params}"
+        else: 
+            # Use the more stable /headlines/section/topic/ format
+            topic_id = g_map.get(category_code, "")
+            if topic_id:
+                url = f"https://news.google.com/rss/headlines/section/topic/{topic_id}?{params}"
+            else:
+                url = f"https://news.google.com/rss?{params}"
+    elif source == "Qiita":
+        url = f"https://qiita.com/tags/{quote(query_text) if category_code == 'SEARCH' else 'Python'}/feed"
+    elif source == "Zenn":
+        url = f"https://zenn.dev/topics/{quote(query_text.lower()) if category_code == 'SEARCH' else 'tech'}/feed"
+    elif source == "ITmedia":
+        it_map = {
+            "ALL": "itmedia_all.xml", "MOBILE": "mobile.xml", "ENTERPRISE": "enterprise.xml",
+            "PCUSER": "pcuser.xml", "BUSINESS": "business.xml"
+        }
+        url = f"https://rss.itmedia.co.jp/rss/2.0/{it_map.get(category_code, 'itmedia_all.xml')}"
+    elif source == "ナタリー":
+        natalie_map = {
+            "MUSIC": "music", "MOVIE": "eiga", "COMEDY": "owarai", "COMIC": "comic"
+        }
+        category = natalie_map.get(category_code, "music")
+        url = f"https://natalie.mu/{category}/feed/news"
+    elif source == "CNET Japan":
+        url = "https://japan.cnet.com/rss/index.rdf"
+    elif source == "TechCrunch Japan":
+        url = "https://techcrunch.com/tag/japan/feed/"
+    elif source == "Gigazine":
+        url = "https://gigazine.net/news/rss_2.0/"
+    elif source == "ライブドアニュース":
+        url = "https://news.livedoor.com/topics/rss/top.xml"
+
+    return url
+
+# --- Conditional GET ---
+# Concurrent fetches of the same URL (e.g. 総合トップ and おすすめ, or many
+# sessions after a cache expiry) share one upstream request.
+flights = SingleFlight()
+
+def fetch_feed(url, source):
+    """Fetch a feed, revalidating with ETag / Last-Modified.
+
+    On 304 the stored parsed articles are returned without running feedparser.
+    While the source's breaker is open the stored articles are returned
+    without a request (CircuitOpenError if there are none). Raises on
+    network/HTTP errors (callers decide how to degrade); every outcome is
+    recorded in source_health.
+    """
+    return flights.do(url, _fetch_feed, url, source)
+
+def _fetch_feed(url, source):
+    cached = db.load_feed_cache(url)
+    health = source_health.get(source)
+    if not health.allow():
+        _count('short_circuited')
+        if cached:
+            return cached['articles']
+        raise source_health.CircuitOpenError(f"{source}: circuit open")
+
+    headers = {}
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    _count('requests')
+    start = time.perf_counter()
+    try:
+        response = http_client.get(url, headers=headers, timeout=health.timeout())
+        if response.status_code == 304 and cached:
+            health.record_success(time.perf_counter() - start)
+            _count('not_modified')
+            _count('bytes_saved', cached['body_size'] or 0)
+            db.touch_feed_cache(url)
+            return cached['articles']
+        response.raise_for_status()
+        latency = time.perf_counter() - start
+        articles = fill_undated(parse_feed(response.content, source), cached['articles'] if cached else ())
+    except Exception as e:
+        health.record_failure(source_health.classify(e), str(e)[:200])
+        raise
+    health.record_success(latency)
+
+    # Wire size (compressed if gzip was negotiated), else decoded size
+    body_size = int(response.headers.get('Content-Length') or len(response.content))
+    db.save_feed_cache(
+        url,
+        response.headers.get('ETag'),
+        response.headers.get('Last-Modified'),
+        articles,
+        body_size
+    )
+    return articles
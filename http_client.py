@@ -0,0 +1,194 @@
+import ipaddress
+import os
+import threading
+import weakref
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+# --- Pool Settings (override with environment variables) ---
+POOL_CONNECTIONS = int(os.environ.get("AINEWS_POOL_CONNECTIONS", 32))  # Number of host pools kept alive
+POOL_MAXSIZE = int(os.environ.get("AINEWS_POOL_MAXSIZE", 10))  # Keep-alive connections per host
+MAX_PER_HOST = int(os.environ.get("AINEWS_MAX_PER_HOST", 6))  # Concurrent requests per host
+DEFAULT_TIMEOUT = 5
+
+DEFAULT_HEADERS = {
+    # User-Agent avoids 403 Forbidden from some sites (Qiita, Zenn, etc.)
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+_lock = threading.Lock()
+_session = None
+_public_session = None
+_host_slots = {}
+_max_per_host = MAX_PER_HOST
+
+
+def configure(pool_connections=None, pool_maxsize=None, max_per_host=None):
+    """Rebuild the shared session with new pool sizes / per-host caps."""
+    global _session, _public_session, _max_per_host, POOL_CONNECTIONS, POOL_MAXSIZE
+    with _lock:
+        if pool_connections is not None:
+            POOL_CONNECTIONS = pool_connections
+        if pool_maxsize is not None:
+            POOL_MAXSIZE = pool_maxsize
+        if max_per_host is not None:
+            _max_per_host = max_per_host
+            _host_slots.clear()
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _public_session is not None:
+            _public_session.close()
+            _public_session = None
+
+
+# --- Public-only connections (URLs taken from untrusted content) ---
+def is_public_address(address):
+    """True if an IP address string is globally routable (not loopback, private, link-local...)."""
+    ip = ipaddress.ip_address(address.split('%')[0])
+    if getattr(ip, 'ipv4_mapped', None):
+        ip = ip.ipv4_mapped
+    return ip.is_global
+
+
+class _PublicOnly:
+    """Refuses a connected socket whose peer is not public, before any request byte is sent.
+
+    Checking the address actually connected to (not an earlier DNS lookup)
+    means a name that re-resolves to an internal address is still refused.
+    """
+
+    def _new_conn(self):
+        sock = super()._new_conn()
+        peer = sock.getpeername()[0]
+        if not is_public_address(peer):
+            sock.close()
+            raise NewConnectionError(self, f"refusing connection to non-public address {peer}")
+        return sock
+
+
+class _PublicHTTPConnection(_PublicOnly, HTTPConnection):
+    pass
+
+
+class _PublicHTTPSConnection(_PublicOnly, HTTPSConnection):
+    pass
+
+
+class _PublicHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _PublicHTTPConnection
+
+
+class _PublicHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _PublicHTTPSConnection
+
+
+class _PublicAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _PublicHTTPPool, 'https': _PublicHTTPSPool}
+
+
+def _build_session(adapter_cls=HTTPAdapter):
+    session = requests.Session()
+    adapter = adapter_cls(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_session():
+    """Return the process-wide session (created on first use)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get_public_session():
+    """Process-wide session that only connects to public addresses (no proxies)."""
+    global _public_session
+    if _public_session is None:
+        with _lock:
+            if _public_session is None:
+                session = _build_session(_PublicAdapter)
+                session.trust_env = False  # the peer must be the target itself
+                _public_session = session
+    return _public_session
+
+
+def _host_slot(host):
+    slot = _host_slots.get(host)
+    if slot is None:
+        with _lock:
+            slot = _host_slots.setdefault(host, threading.BoundedSemaphore(_max_per_host))
+    return slot
+
+
+def get(url, headers=None, timeout=DEFAULT_TIMEOUT, stream=False, public_only=False, **kwargs):
+    """GET through the shared keep-alive pool, capped per host.
+
+    public_only refuses to connect to non-public addresses (see _PublicOnly);
+    every connection is checked, redirect hops included.
+
+    A streamed response holds its host slot until it is closed (or collected),
+    so body reads count against the cap too; always close it.
+    """
+    slot = _host_slot(urlparse(url).netloc)
+    slot.acquire()
+    try:
+        session = get_public_session() if public_only else get_session()
+        response = session.get(url, headers=headers, timeout=timeout, stream=stream, **kwargs)
+    except BaseException:
+        slot.release()
+        raise
+    if not stream:
+        slot.release()
+        return response
+    release = weakref.finalize(response, slot.release)  # runs at most once
+    # Only a weak reference back to the response: a cycle would delay the
+    # finalizer until the cyclic GC runs instead of the last reference going
+    ref = weakref.ref(response)
+
+    def close_and_release():
+        try:
+            r = ref()
+            if r is not None:
+                requests.Response.close(r)
+        finally:
+            release()
+
+    response.close = close_and_release
+    return response
+
+
+def stats():
+    """Connection stats across all host pools (connections opened = handshakes)."""
+    result = {'hosts': 0, 'connections': 0, 'requests': 0}
+    session = _session
+    if session is None:
+        return result
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            result['hosts'] += 1
+            result['connections'] += pool.num_connections
+            result['requests'] += pool.num_requests
+    return result
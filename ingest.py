@@ -0,0 +1,180 @@
+"""Background feed ingestion, decoupled from Streamlit reruns.
+
+A single scheduler per process polls every (source, category) feed on its
+own interval and writes the parsed articles into the local store
+(feed_cache in news_app_v2.db) and the long-term articles archive. The UI
+only reads from that store, so the number of upstream requests does not
+depend on how many users are connected.
+
+Run it as a separate process with:
+
+    AINEWS_INGEST_MODE=external streamlit run app.py   # UI: read-only
+    python ingest.py                                    # poller
+"""
+import concurrent.futures
+import heapq
+import os
+import random
+import threading
+import time
+
+import clustering
+import database as db
+import feeds
+import source_health
+
+DEFAULT_INTERVAL = 300  # seconds
+# Per-source poll interval (seconds)
+POLL_INTERVALS = {
+    "Bing News": 300,
+    "Google News": 300,
+    "Yahoo! ニュース": 300,
+    "NHK ニュース": 300,
+    "ライブドアニュース": 300,
+    "ITmedia": 600,
+    "Gigazine": 600,
+    "CNET Japan": 600,
+    "TechCrunch Japan": 900,
+    "ナタリー": 900,
+    "Qiita": 900,
+    "Zenn": 900,
+}
+INGEST_MODE = os.environ.get("AINEWS_INGEST_MODE", "thread")  # thread | external
+COLD_READ_TIMEOUT = 10  # max seconds a reader waits for the first poll of a feed
+
+
+def all_feeds():
+    """Every (source, category_code) pair the UI can show."""
+    return [
+        (source, code)
+        for source, cats in feeds.SOURCE_CATEGORIES.items()
+        for code in cats.values()
+    ]
+
+
+class IngestScheduler:
+    """Polls feeds on a per-source interval in a daemon thread."""
+
+    def __init__(self, intervals=None, max_workers=4):
+        self.intervals = dict(POLL_INTERVALS)
+        if intervals:
+            self.intervals.update(intervals)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self.lock = threading.RLock()  # done-callback may run inline under the lock
+        self.in_flight = {}  # (source, category) -> Future
+        self.status = {}  # (source, category) -> {'last_run', 'count', 'error', 'reason'}
+        self.running = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="ingest-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.running = False
+        self.executor.shutdown(wait=False)
+
+    def _run(self):
+        # Spread the first round over a few seconds to avoid a burst on start
+        now = time.time()
+        queue = [(now + random.uniform(0, 5), key) for key in all_feeds()]
+        heapq.heapify(queue)
+        while not self._stop.is_set():
+            due, key = queue[0]
+            wait = due - time.time()
+            if wait > 0:
+                self._stop.wait(min(wait, 1.0))
+                continue
+            heapq.heappop(queue)
+            try:
+                self.submit(*key)
+            except RuntimeError:
+                # Executor shut down (stop() or interpreter exit)
+                break
+            interval = self.intervals.get(key[0], DEFAULT_INTERVAL)
+            heapq.heappush(queue, (time.time() + interval, key))
+
+    def submit(self, source, category_code):
+        """Queue a poll unless one is already running for this feed."""
+        key = (source, category_code)
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is None:
+                future = self.executor.submit(self.poll, source, category_code)
+                self.in_flight[key] = future
+                future.add_done_callback(lambda f, key=key: self._done(key))
+            return future
+
+    def _done(self, key):
+        with self.lock:
+            self.in_flight.pop(key, None)
+
+    def poll(self, source, category_code):
+        """Fetch one feed upstream and write it to the store."""
+        key = (source, category_code)
+        url = feeds.resolve_feed_url(source, category_code)
+        try:
+            articles = feeds.fetch_feed(url, source)
+            db.upsert_articles(articles, category_code)
+            clustering.get_story_clusterer().assign(articles)
+            self.status[key] = {'last_run': time.time(), 'count': len(articles), 'error': None, 'reason': None}
+            return articles
+        except Exception as e:
+            self.status[key] = {'last_run': time.time(), 'count': 0, 'error': str(e),
+                                'reason': source_health.classify(e)}
+            return []
+
+    def read(self, source, category_code):
+        """Articles for a feed from the store (never blocks on upstream once warm)."""
+        url = feeds.resolve_feed_url(source, category_code)
+        if not url:
+            return []
+        cached = db.load_feed_cache(url)
+        if cached:
+            return cached['articles']
+        if not self.running:
+            return []
+        # Cold store: wait for the scheduler's poll (shared by every reader)
+        try:
+            return self.submit(source, category_code).result(timeout=COLD_READ_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            return []
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler; polling starts unless ingestion runs externally."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                scheduler = IngestScheduler()
+                if INGEST_MODE != "external":
+                    scheduler.start()
+                _scheduler = scheduler
+    return _scheduler
+
+
+if __name__ == "__main__":
+    db.init_db()
+    scheduler = IngestScheduler()
+    scheduler.start()
+    print(f"Polling {len(all_feeds())} feeds. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(60)
+            errors = sum(1 for st in scheduler.status.values() if st['error'])
+            print(f"[ingest] feeds={len(scheduler.status)} errors={errors}")
+            for h in source_health.snapshot():
+                if h['state'] != source_health.CLOSED:
+                    print(f"[ingest] {h['source']}: {h['state']} ({h['last_failure']['reason']})")
+    except KeyboardInterrupt:
+        scheduler.stop()
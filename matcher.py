@@ -0,0 +1,141 @@
+"""Compiled keyword / mute-word matcher for recommendation scoring and filtering.
+
+A TermMatcher is built once per (keywords, mute_words) set (see get_matcher)
+with every term lower-cased up front. Each article is lower-cased once and
+scanned in a single pass for all terms with an Aho-Corasick automaton
+(pyahocorasick). Without that package it falls back to plain substring
+checks with the pre-lowered terms; both paths give identical results.
+"""
+import functools
+
+try:
+    import ahocorasick
+except ImportError:  # optional C extension, see _match_batch_loop
+    ahocorasick = None
+
+# Points, same as the original calculate_article_score
+TITLE_POINTS = 30
+SUMMARY_POINTS = 20
+MATCH_BONUS = 15
+
+
+def _unique_lower(terms):
+    seen = []
+    for t in terms or ():
+        t = (t or "").lower().replace("\n", " ").replace("\x00", "")
+        if t and t not in seen:
+            seen.append(t)
+    return seen
+
+
+class TermMatcher:
+    def __init__(self, keywords=(), mute_words=()):
+        self.keywords = _unique_lower(keywords)
+        self.mute_words = _unique_lower(mute_words)
+        self.keyword_set = set(self.keywords)
+        self.mute_set = set(self.mute_words)
+        self.terms = list(dict.fromkeys(self.keywords + self.mute_words))
+        self.automaton = None
+        if ahocorasick is not None and self.terms:
+            self.automaton = ahocorasick.Automaton()
+            for term in self.terms:
+                self.automaton.add_word(term, (term, len(term), term in self.keyword_set, term in self.mute_set))
+            self.automaton.make_automaton()
+
+    def match_batch(self, articles):
+        """Return (scores, muted) lists aligned with `articles`."""
+        if self.automaton is None:
+            return self._match_batch_loop(articles)
+        scores = []
+        muted = []
+        iter_matches = self.automaton.iter
+        for a in articles:
+            title = a['title'].lower()
+            title_len = len(title)
+            score = 0
+            is_muted = False
+            seen = set()
+            # Matches come in order of end offset, so a term's first hit is its earliest
+            for end, (term, length, is_keyword, is_mute) in iter_matches(title + "\n" + a['summary'].lower()):
+                if term in seen:
+                    continue
+                seen.add(term)
+                if is_keyword:
+                    points = TITLE_POINTS if end - length + 1 < title_len else SUMMARY_POINTS
+                    score += points if score else points + MATCH_BONUS
+                if is_mute:
+                    is_muted = True
+            scores.append(score)
+            muted.append(is_muted)
+        return scores, muted
+
+    def _match_batch_loop(self, articles):
+        """Fallback without pyahocorasick: substring checks with pre-lowered terms."""
+        scores = []
+        muted = []
+        for a in articles:
+            title = a['title'].lower()
+            summary = a['summary'].lower()
+            score = 0
+            for kw in self.keywords:
+                if kw in title:
+                    score += TITLE_POINTS
+                elif kw in summary:
+                    score += SUMMARY_POINTS
+            if score:
+                score += MATCH_BONUS
+            text = title + "\n" + summary
+            scores.append(score)
+            muted.append(any(mw in text for mw in self.mute_words))
+        return scores, muted
+
+    def keyword_hits(self, articles):
+        """Sparse keyword hits for building a hit matrix.
+
+        Returns (rows, cols, in_title, muted): article index, keyword index
+        (into self.keywords) and whether the first hit is in the title, plus
+        one mute flag per article.
+        """
+        keyword_index = {kw: j for j, kw in enumerate(self.keywords)}
+        rows, cols, in_title = [], [], []
+        muted = [False] * len(articles)
+        for i, a in enumerate(articles):
+            title = a['title'].lower()
+            summary = a['summary'].lower()
+            if self.automaton is not None:
+                seen = set()
+                for end, (term, length, is_keyword, is_mute) in self.automaton.iter(title + "\n" + summary):
+                    if term in seen:
+                        continue
+                    seen.add(term)
+                    if is_keyword:
+                        rows.append(i)
+                        cols.append(keyword_index[term])
+                        in_title.append(end - length + 1 < len(title))
+                    if is_mute:
+                        muted[i] = True
+            else:
+                for j, kw in enumerate(self.keywords):
+                    if kw in title or kw in summary:
+                        rows.append(i)
+                        cols.append(j)
+                        in_title.append(kw in title)
+                text = title + "\n" + summary
+                muted[i] = any(mw in text for mw in self.mute_words)
+        return rows, cols, in_title, muted
+
+    def score(self, article):
+        return self.match_batch([article])[0][0]
+
+    def is_muted(self, article):
+        return self.match_batch([article])[1][0]
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_matcher(keywords, mute_words):
+    return TermMatcher(keywords, mute_words)
+
+
+def get_matcher(keywords=(), mute_words=()):
+    """Compiled matcher, cached per keyword / mute-word set."""
+    return _cached_matcher(tuple(keywords or ()), tuple(mute_words or ()))
@@ -0,0 +1,123 @@
+"""Compact article records.
+
+Articles used to be plain dicts: 'id' repeated the URL in 'link', a
+formatted 'published' string sat next to 'published_ts', and every article
+held its own copy of the source name. Article keeps one slot per stored
+field, interns source and category (a few dozen distinct values), uses the
+stable 64-bit url_hash as its id and formats 'published' on access.
+
+Rendering code keeps reading articles like the old dicts: article['title'],
+article.get('category', default), 'img_src' in article, dict(article).
+A field that is None counts as missing, like an absent dict key did.
+Pickling (st.cache_data) stores a bare tuple of the slots per article.
+"""
+import hashlib
+import sys
+import time
+
+# Stored fields, in slot / pickle order; dict(article) has these keys
+FIELDS = ('title', 'link', 'summary', 'img_src', 'source', 'category', 'published_ts')
+_KEYS = frozenset(FIELDS + ('id', 'url_hash', 'published'))
+_INTERNED = ('source', 'category')
+
+
+def url_hash(url):
+    """Stable signed 64-bit hash of an article URL (fits SQLite INTEGER)."""
+    return int.from_bytes(hashlib.sha1(url.encode()).digest()[:8], 'big', signed=True)
+
+
+def format_published(ts):
+    """Display form of an article's published epoch (server local time)."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Article:
+    __slots__ = FIELDS + ('url_hash',)
+
+    def __init__(self, title, link, summary="", img_src="", source=None, category=None,
+                 published_ts=0, _hash=None):
+        self.title = title
+        self.link = link
+        self.summary = summary
+        self.img_src = img_src
+        self.source = _intern(source)
+        self.category = _intern(category)
+        self.published_ts = int(published_ts or 0)
+        self.url_hash = _hash if _hash is not None else url_hash(link)
+
+    @classmethod
+    def from_dict(cls, d):
+        """Article from a stored dict (feed cache / bookmark JSON, old or new layout)."""
+        ts = d.get('published_ts')
+        if not ts and d.get('published'):
+            # Saved before published_ts existed
+            try:
+                ts = time.mktime(time.strptime(d['published'][:19], '%Y-%m-%d %H:%M:%S'))
+            except ValueError:
+                ts = 0
+        return cls(d.get('title', 'No Title'), d.get('link', '#'), d.get('summary') or "",
+                   d.get('img_src') or "", d.get('source'), d.get('category'), ts)
+
+    @property
+    def id(self):
+        return self.url_hash
+
+    @property
+    def published(self):
+        return format_published(self.published_ts) if self.published_ts else ""
+
+    # --- dict compatibility ---
+    def __getitem__(self, key):
+        if key not in _KEYS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        if key not in _KEYS:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return key in _KEYS and getattr(self, key) is not None
+
+    def __setitem__(self, key, value):
+        if key not in FIELDS:
+            raise KeyError(key)
+        setattr(self, key, _intern(value) if key in _INTERNED else value)
+
+    def keys(self):
+        return [k for k in FIELDS if getattr(self, k) is not None]
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.keys()}
+
+    def __eq__(self, other):
+        if not isinstance(other, Article):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    __hash__ = None  # mutable, like the dicts it replaces
+
+    def __reduce__(self):
+        return _restore, ((self.title, self.link, self.summary, self.img_src, self.source,
+                           self.category, self.published_ts, self.url_hash),)
+
+    def __repr__(self):
+        return f"Article({self.title!r}, {self.link!r}, source={self.source!r})"
+
+
+def _restore(values):
+    article = object.__new__(Article)
+    (article.title, article.link, article.summary, article.img_src, source, category,
+     article.published_ts, article.url_hash) = values
+    article.source = _intern(source)
+    article.category = _intern(category)
+    return article
@@ -0,0 +1,167 @@
+"""og:image lookup with a persistent cache.
+
+Resolved image URLs are stored in the og_images table, so they survive
+restarts and are shared by every session. Misses are stored too (image =
+''), with a shorter TTL, so a page without og:image is not re-downloaded on
+every click. A failed fetch (connection error, timeout, HTTP error) is not
+a miss: it is never stored, only skipped for ERROR_TTL in this process, so
+one transient error does not hide an image for hours. resolve_many() serves
+a whole page of articles with one cache query and fetches the rest in
+parallel.
+
+Pages are streamed through an incremental HTML parser that stops at the
+first og:image (or </head>, <body>, or MAX_HEAD_BYTES), so a lookup reads a
+few KB instead of the whole article.
+"""
+import codecs
+import concurrent.futures
+import html.parser
+import threading
+import time
+
+import database as db
+import http_client
+from singleflight import SingleFlight
+
+HIT_TTL = db.OG_IMAGE_HIT_TTL  # seconds; expired rows are swept by the DB sweeper
+MISS_TTL = db.OG_IMAGE_MISS_TTL  # seconds
+ERROR_TTL = 300  # seconds before a failed fetch is retried
+MAX_WORKERS = 8
+FETCH_TIMEOUT = 5
+CHUNK_SIZE = 8 * 1024
+MAX_HEAD_BYTES = 256 * 1024  # stop reading here even if </head> never came
+
+flights = SingleFlight()
+_errors = {}  # url -> time of the last failed fetch
+_errors_lock = threading.Lock()
+
+
+class _HeadScanner(html.parser.HTMLParser):
+    """Incremental scan of <head> for og:image (twitter:image as a fallback)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.og_image = None
+        self.twitter_image = None
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            attrs = dict(attrs)
+            key = (attrs.get('property') or attrs.get('name') or '').lower()
+            content = (attrs.get('content') or '').strip()
+            if not content:
+                return
+            if key == 'og:image':
+                self.og_image = content
+                self.done = True
+            elif key in ('twitter:image', 'twitter:image:src') and self.twitter_image is None:
+                self.twitter_image = content
+        elif tag == 'body':
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.done = True
+
+
+def scan_head(chunks, encoding=None, max_bytes=MAX_HEAD_BYTES):
+    """Feed byte chunks to the scanner until og:image, </head> or max_bytes.
+
+    Returns (image or '', bytes consumed).
+    """
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    scanner = _HeadScanner()
+    consumed = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        consumed += len(chunk)
+        scanner.feed(decoder.decode(chunk))
+        if scanner.done or consumed >= max_bytes:
+            break
+    return scanner.og_image or scanner.twitter_image or "", consumed
+
+
+def extract_og_image(url):
+    """og:image of a page ('' if it has none, None if it could not be fetched).
+
+    Reads only as far as </head>.
+    """
+    try:
+        response = http_client.get(url, timeout=FETCH_TIMEOUT, stream=True)
+    except Exception:
+        return None
+    try:
+        response.raise_for_status()
+        # Only trust an explicit charset (requests assumes ISO-8859-1 for text/* without one)
+        encoding = None
+        if 'charset' in response.headers.get('Content-Type', '').lower():
+            try:
+                encoding = codecs.lookup(response.encoding).name
+            except (LookupError, TypeError):
+                pass
+        image, _ = scan_head(response.iter_content(CHUNK_SIZE), encoding)
+        return image
+    except Exception:
+        return None
+    finally:
+        # Drops the connection if the body was not read to the end
+        response.close()
+
+
+def _fresh(entry, now):
+    image, fetched_at = entry
+    return now - fetched_at < (HIT_TTL if image else MISS_TTL)
+
+
+def cached(urls):
+    """{url: image} for URLs with a fresh cache entry (hits only, no network)."""
+    now = time.time()
+    return {u: e[0] for u, e in db.load_og_images(urls).items() if e[0] and _fresh(e, now)}
+
+
+def resolve_many(urls, max_workers=MAX_WORKERS):
+    """{url: image or ''} for every URL: fresh cache entries first, the rest fetched in parallel."""
+    urls = [u for u in dict.fromkeys(urls) if u and u != "#"]
+    now = time.time()
+    result = {}
+    for u, entry in db.load_og_images(urls).items():
+        if _fresh(entry, now):
+            result[u] = entry[0]
+    with _errors_lock:
+        for u in urls:
+            if u not in result and now - _errors.get(u, 0) < ERROR_TTL:
+                result[u] = ""
+    missing = [u for u in urls if u not in result]
+    if missing:
+        fetched = {}
+        failed = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+            for u, image in zip(missing, executor.map(lambda u: flights.do(u, extract_og_image, u), missing)):
+                if image is None:
+                    failed.append(u)
+                else:
+                    fetched[u] = image
+        if fetched:
+            db.save_og_images(fetched)
+        _record_errors(failed, now)
+        result.update(fetched)
+        result.update((u, "") for u in failed)
+    return result
+
+
+def _record_errors(failed, now):
+    with _errors_lock:
+        if len(_errors) > 10000:
+            for u in [u for u, t in _errors.items() if now - t >= ERROR_TTL]:
+                del _errors[u]
+        for u in failed:
+            _errors[u] = now
+
+
+def resolve(url):
+    """og:image for one URL ('' if none)."""
+    if not url or url == "#":
+        return ""
+    return resolve_many([url]).get(url, "")
@@ -0,0 +1,163 @@
+"""Read tracking: buffered click / impression writes and an in-memory read index.
+
+Events go into an in-memory buffer. A flush thread writes them to
+read_history in batches (executemany). It runs every FLUSH_INTERVAL seconds,
+or sooner once FLUSH_BATCH events are waiting. Impressions of the same
+article are summed before writing. If a write fails (e.g. the busy timeout
+under contention) the batch goes back into the buffer for the next flush.
+
+Each user's opened URLs are kept in a set. It is warmed from the table on
+first use, so views can check "already read" without a query. The same
+thread compacts the table every COMPACT_EVERY seconds: rows older than
+RETENTION go, and each user keeps at most MAX_ROWS_PER_USER rows.
+"""
+import atexit
+import collections
+import threading
+import time
+
+import database as db
+
+FLUSH_INTERVAL = 5  # seconds
+FLUSH_BATCH = 500  # events
+RETENTION = 90 * 24 * 3600  # seconds
+MAX_ROWS_PER_USER = 5000
+COMPACT_EVERY = 3600  # seconds
+MAX_CACHED_USERS = 1024  # read sets kept in memory (LRU)
+
+
+class ReadTracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clicks = []  # (email, url, ts)
+        self.impressions = collections.Counter()  # (email, url) -> count
+        self.last_seen = {}  # (email, url) -> ts
+        self.read_sets = collections.OrderedDict()  # email -> set of opened URLs
+        self.stats = {'events': 0, 'flushed': 0, 'flushes': 0, 'failed': 0, 'pruned': 0}
+        self.last_compact = time.time()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="read-tracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.time() - self.last_compact > COMPACT_EVERY:
+                    self.compact()
+            except Exception as e:
+                print(f"Read tracking flush failed: {e}")
+
+    def _pending(self):
+        return len(self.clicks) + len(self.impressions)
+
+    def record_click(self, email, url):
+        """User opened an article: it counts as read from now on."""
+        now = time.time()
+        with self.lock:
+            self.clicks.append((email, url, now))
+            self.stats['events'] += 1
+            read = self.read_sets.get(email)
+            if read is not None:
+                read.add(url)
+            full = self._pending() >= FLUSH_BATCH
+        if full:
+            self._wake.set()
+
+    def record_impressions(self, email, urls):
+        """Articles were shown to the user (not read)."""
+        now = time.time()
+        with self.lock:
+            for url in urls:
+                self.impressions[(email, url)] += 1
+                self.last_seen[(email, url)] = now
+                self.stats['events'] += 1
+            full = self._pending() >= FLUSH_BATCH
+        if full:
+            self._wake.set()
+
+    def read_urls(self, email):
+        """Set of URLs the user has opened (shared; do not modify)."""
+        with self.lock:
+            read = self.read_sets.get(email)
+            if read is not None:
+                self.read_sets.move_to_end(email)
+                return read
+        loaded = set(db.get_read_urls(email, MAX_ROWS_PER_USER))
+        with self.lock:
+            read = self.read_sets.setdefault(email, loaded)
+            if read is not loaded:
+                return read
+            # Clicks still in the buffer were made before the set existed
+            read.update(url for e, url, _ in self.clicks if e == email)
+            if len(self.read_sets) > MAX_CACHED_USERS:
+                self.read_sets.popitem(last=False)
+            return read
+
+    def flush(self):
+        """Write buffered events to read_history; returns how many rows were written."""
+        with self.lock:
+            clicks = self.clicks
+            impressions = [(email, url, count, self.last_seen[(email, url)])
+                           for (email, url), count in self.impressions.items()]
+            self.clicks = []
+            self.impressions = collections.Counter()
+            self.last_seen = {}
+        if not clicks and not impressions:
+            return 0
+        try:
+            db.record_reads(clicks, impressions)
+        except Exception:
+            self._requeue(clicks, impressions)
+            raise
+        with self.lock:
+            self.stats['flushed'] += len(clicks) + len(impressions)
+            self.stats['flushes'] += 1
+        return len(clicks) + len(impressions)
+
+    def _requeue(self, clicks, impressions):
+        """Put an unwritten batch back, ahead of events recorded meanwhile."""
+        with self.lock:
+            self.clicks = clicks + self.clicks
+            for email, url, count, ts in impressions:
+                self.impressions[(email, url)] += count
+                self.last_seen[(email, url)] = max(ts, self.last_seen.get((email, url), ts))
+            self.stats['failed'] += 1
+
+    def compact(self):
+        """Apply retention and the per-user row cap."""
+        removed = db.prune_read_history(time.time() - RETENTION, MAX_ROWS_PER_USER)
+        self.last_compact = time.time()
+        with self.lock:
+            self.stats['pruned'] += removed
+        return removed
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker():
+    """Process-wide tracker; the flush thread starts on first use."""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                tracker = ReadTracker()
+                tracker.start()
+                atexit.register(tracker.stop)
+                _tracker = tracker
+    return _tracker
@@ -0,0 +1,78 @@
+"""Vectorized batch scoring for recommendations.
+
+Articles are turned into a columnar frame, keyword hits into an
+(articles x keywords) matrix, and the score is computed with NumPy:
+
+    score = sum(title hit 30 / summary hit 20 per keyword) + freshness
+
+Freshness replaces the old flat +15: it starts at FRESHNESS_POINTS for a
+brand-new article and halves every FRESHNESS_HALF_LIFE seconds. Articles
+without a date get the value for one half-life. Only articles with at least
+one keyword hit (and no mute word) get a score. Top-K uses argpartition, so
+ranking a whole archive window costs about the same as the current fetch.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+import matcher
+
+TITLE_WEIGHT = matcher.TITLE_POINTS
+SUMMARY_WEIGHT = matcher.SUMMARY_POINTS
+FRESHNESS_POINTS = 15
+FRESHNESS_HALF_LIFE = 24 * 3600
+
+
+def articles_frame(articles):
+    """Columnar frame of the fields used for ranking."""
+    return pd.DataFrame({
+        'source': [a.get('source') for a in articles],
+        'published_ts': np.fromiter((a.get('published_ts') or 0 for a in articles),
+                                    dtype=np.int64, count=len(articles)),
+    })
+
+
+def hit_matrix(articles, keywords, mute_words=()):
+    """int8 matrix (0 none, 1 summary, 2 title) and a muted flag per article."""
+    m = matcher.get_matcher(keywords, mute_words)
+    rows, cols, in_title, muted = m.keyword_hits(articles)
+    hits = np.zeros((len(articles), len(m.keywords)), dtype=np.int8)
+    if rows:
+        hits[rows, cols] = np.where(in_title, 2, 1)
+    return hits, np.asarray(muted, dtype=bool)
+
+
+def score_articles(articles, keywords, mute_words=(), now=None, source=None):
+    """Float score per article (0 = no keyword hit, muted, or other source)."""
+    if not articles or not keywords:
+        return np.zeros(len(articles))
+    now = now or time.time()
+    frame = articles_frame(articles)
+    hits, muted = hit_matrix(articles, keywords, mute_words)
+
+    weights = np.array([0, SUMMARY_WEIGHT, TITLE_WEIGHT], dtype=np.float64)
+    keyword_points = weights[hits].sum(axis=1)
+
+    ts = frame['published_ts'].to_numpy()
+    age = np.where(ts > 0, np.maximum(now - ts, 0), FRESHNESS_HALF_LIFE)
+    freshness = FRESHNESS_POINTS * np.exp2(-age / FRESHNESS_HALF_LIFE)
+
+    keep = (keyword_points > 0) & ~muted
+    if source:
+        keep &= frame['source'].to_numpy() == source
+    return np.where(keep, keyword_points + freshness, 0.0)
+
+
+def rank_articles(articles, keywords, mute_words=(), k=None, now=None, source=None):
+    """Best-first [(points, article)] for scoring articles, at most k.
+
+    Returns (ranked, total) where total is the number of scoring articles.
+    """
+    scores = score_articles(articles, keywords, mute_words, now, source)
+    matched = np.flatnonzero(scores > 0)
+    total = len(matched)
+    if k is not None and k < total:
+        matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+    order = matched[np.argsort(-scores[matched], kind='stable')]
+    return [(int(round(scores[i])), articles[i]) for i in order], total
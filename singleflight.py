@@ -0,0 +1,58 @@
+"""Single-flight request coalescing.
+
+Concurrent callers asking for the same key while a call is in flight wait
+for that call and share its result (or exception) instead of starting
+their own.
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.stats = {'calls': 0, 'executions': 0, 'shared': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once per key at a time; others wait and share."""
+        with self.lock:
+            self.stats['calls'] += 1
+            call = self.calls.get(key)
+            if call is not None:
+                self.stats['shared'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def coalescing_ratio(self):
+        """Share of calls that were served by another caller's in-flight request."""
+        with self.lock:
+            calls = self.stats['calls']
+            return self.stats['shared'] / calls if calls else 0.0
@@ -0,0 +1,173 @@
+"""Per-source health: latency percentiles, error rates and a circuit breaker.
+
+Every upstream feed request reports its outcome here. Successful latencies
+feed a rolling window whose p95 sets the next request's timeout, so a source
+that normally answers in 300 ms no longer holds a worker for the full
+MAX_TIMEOUT when it hangs.
+
+After FAILURE_THRESHOLD consecutive failures the breaker opens: requests to
+that source are skipped and callers serve the last good result (the feed
+cache) instead. Once the cool-down has passed a single probe request is let
+through (half-open); success closes the breaker, failure reopens it with a
+doubled cool-down (up to MAX_OPEN_SECONDS).
+
+Failures are kept as structured records (time, reason, detail) rather than
+being swallowed, see classify().
+"""
+import collections
+import math
+import threading
+import time
+
+import requests
+
+# --- Breaker / Timeout Settings ---
+FAILURE_THRESHOLD = 3  # consecutive failures before the breaker opens
+OPEN_SECONDS = 60  # first cool-down before a half-open probe
+MAX_OPEN_SECONDS = 600
+WINDOW = 50  # outcomes / latencies kept per source
+MIN_SAMPLES = 5  # latencies needed before the timeout adapts
+TIMEOUT_FACTOR = 3.0  # timeout = p95 * factor, clamped below
+MIN_TIMEOUT = 1.0  # seconds
+MAX_TIMEOUT = 5.0  # seconds (the old fixed timeout)
+MAX_FAILURES_KEPT = 20
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The source's breaker is open and there is no last good result to serve."""
+
+
+def classify(error):
+    """Failure reason for an exception: timeout, connection, http_<status>, parse or error."""
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.ConnectionError):
+        return "connection"
+    if isinstance(error, requests.HTTPError):
+        status = getattr(error.response, 'status_code', None)
+        return f"http_{status}" if status else "http"
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, (ValueError, SyntaxError)):
+        return "parse"
+    return "error"
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty sequence (q in 0..100)."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class SourceHealth:
+    def __init__(self, source):
+        self.source = source
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=WINDOW)  # seconds, successes only
+        self.outcomes = collections.deque(maxlen=WINDOW)  # True = success
+        self.failures = collections.deque(maxlen=MAX_FAILURES_KEPT)  # {'time', 'reason', 'detail'}
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = OPEN_SECONDS
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.stats = {'requests': 0, 'failures': 0, 'short_circuited': 0, 'opened': 0}
+
+    def allow(self):
+        """Whether a request may go upstream now (claims the probe when half-open)."""
+        now = time.time()
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self.probe_started = None
+            if self.state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back is retried
+                if self.probe_started is None or now - self.probe_started > MAX_TIMEOUT * 2:
+                    self.probe_started = now
+                    return True
+            self.stats['short_circuited'] += 1
+            return False
+
+    def timeout(self):
+        """Request timeout from the observed p95 latency (MAX_TIMEOUT until enough samples)."""
+        with self.lock:
+            if len(self.latencies) < MIN_SAMPLES:
+                return MAX_TIMEOUT
+            p95 = percentile(self.latencies, 95)
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, p95 * TIMEOUT_FACTOR))
+
+    def record_success(self, latency):
+        with self.lock:
+            self.stats['requests'] += 1
+            self.latencies.append(latency)
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self.open_seconds = OPEN_SECONDS
+                self.probe_started = None
+
+    def record_failure(self, reason, detail=""):
+        now = time.time()
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['failures'] += 1
+            self.outcomes.append(False)
+            self.failures.append({'time': now, 'reason': reason, 'detail': detail})
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                # Failed probe: back off harder before the next one
+                self.open_seconds = min(self.open_seconds * 2, MAX_OPEN_SECONDS)
+                self._open(now)
+            elif self.state == CLOSED and self.consecutive_failures >= FAILURE_THRESHOLD:
+                self._open(now)
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.probe_started = None
+        self.stats['opened'] += 1
+
+    def snapshot(self):
+        """Plain-dict view for status displays."""
+        with self.lock:
+            latencies = list(self.latencies)
+            outcomes = list(self.outcomes)
+            last_failure = dict(self.failures[-1]) if self.failures else None
+            state = self.state
+            stats = dict(self.stats)
+        return {
+            'source': self.source,
+            'state': state,
+            'p50': percentile(latencies, 50) if latencies else None,
+            'p95': percentile(latencies, 95) if latencies else None,
+            'error_rate': outcomes.count(False) / len(outcomes) if outcomes else 0.0,
+            'timeout': self.timeout(),
+            'last_failure': last_failure,
+            **stats,
+        }
+
+
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+def get(source):
+    """Health tracker for a source (created on first use)."""
+    health = _sources.get(source)
+    if health is None:
+        with _sources_lock:
+            health = _sources.setdefault(source, SourceHealth(source))
+    return health
+
+
+def snapshot():
+    """Snapshots of every source seen so far, sorted by name."""
+    with _sources_lock:
+        sources = list(_sources.values())
+    return sorted((h.snapshot() for h in sources), key=lambda s: s['source'])
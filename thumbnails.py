@@ -0,0 +1,186 @@
+"""Local thumbnail proxy for card images.
+
+Each remote image is fetched once, cropped and resized to the card size
+(16:9, THUMB_SIZE), re-encoded as WebP (JPEG if Pillow lacks WebP) and
+written to static/thumbs/ under the hash of its bytes. Streamlit serves that
+folder at app/static/ (server.enableStaticServing in .streamlit/config.toml).
+The thumbnails table maps source URL -> file; when the folder grows past
+MAX_CACHE_BYTES the least recently used entries are deleted.
+
+Pages never wait for a thumbnail: local_urls() returns the ones that exist
+and queues the rest on a small background pool, so the next render picks
+them up. Only http(s) URLs whose host resolves to public addresses are
+fetched (checked again on every redirect): image URLs come from feed HTML,
+so they must not reach loopback, private or link-local services. The
+connection itself is checked too (http_client public_only), so a name that
+re-resolves to an internal address after the check is still refused.
+Without Pillow (or with AINEWS_THUMBNAILS=0) nothing is proxied and
+cards keep the remote URL.
+"""
+import concurrent.futures
+import hashlib
+import io
+import os
+import socket
+import threading
+import time
+from urllib.parse import urljoin, urlparse
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # optional, see ENABLED
+    Image = None
+
+import database as db
+import http_client
+
+ENABLED = Image is not None and os.environ.get("AINEWS_THUMBNAILS", "1") != "0"
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "thumbs")
+URL_PREFIX = "app/static/thumbs/"
+THUMB_SIZE = (480, 270)  # one card column, 16:9 like .news-thumb
+QUALITY = 80
+MAX_SOURCE_BYTES = 8 * 1024 * 1024
+MAX_CACHE_BYTES = int(os.environ.get("AINEWS_THUMB_CACHE_MB", 200)) * 1024 * 1024
+ACCESS_REFRESH = 3600  # only rewrite last_access when it is older than this
+RETRY_AFTER = 3600  # seconds before a failed image is tried again
+FETCH_TIMEOUT = 5
+MAX_REDIRECTS = 3
+MAX_WORKERS = 4
+
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="thumbs")
+_pending = set()
+_failed = {}  # url -> time of the failed attempt
+_lock = threading.Lock()
+stats = {'hits': 0, 'queued': 0, 'created': 0, 'failed': 0, 'evicted': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key, amount=1):
+    with _stats_lock:
+        stats[key] += amount
+
+
+def is_public_url(url):
+    """True for an http(s) URL whose host resolves only to public (global) addresses."""
+    try:
+        parts = urlparse(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return False
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError, ValueError):
+        return False
+    return bool(infos) and all(http_client.is_public_address(info[4][0]) for info in infos)
+
+
+def _format():
+    return ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+
+
+def make_thumbnail(data):
+    """Crop/resize image bytes to THUMB_SIZE; returns (encoded bytes, extension)."""
+    fmt, ext = _format()
+    with Image.open(io.BytesIO(data)) as im:
+        im.draft("RGB", (THUMB_SIZE[0] * 2, THUMB_SIZE[1] * 2))  # cheap JPEG downscale on decode
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        im = ImageOps.fit(im, THUMB_SIZE, Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == "WEBP":
+            im.save(out, fmt, quality=QUALITY, method=4)
+        else:
+            im.save(out, fmt, quality=QUALITY, optimize=True)
+    return out.getvalue(), ext
+
+
+def _download(url):
+    for _ in range(MAX_REDIRECTS + 1):
+        if not is_public_url(url):
+            raise ValueError(f"not a public http(s) address: {url}")
+        response = http_client.get(url, timeout=FETCH_TIMEOUT, stream=True, allow_redirects=False,
+                                   public_only=True)
+        if not response.is_redirect:
+            return _read_body(response)
+        response.close()
+        url = urljoin(url, response.headers['location'])
+    raise ValueError("too many redirects")
+
+
+def _read_body(response):
+    try:
+        response.raise_for_status()
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > MAX_SOURCE_BYTES:
+                raise ValueError("image too large")
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        response.close()
+
+
+def build(url):
+    """Fetch, resize and store one thumbnail; returns its file name."""
+    data, ext = make_thumbnail(_download(url))
+    name = f"{hashlib.sha1(data).hexdigest()}.{ext}"
+    path = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(path):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    db.save_thumbnail(url, name, len(data))
+    return name
+
+
+def _build_queued(url):
+    try:
+        build(url)
+        _count('created')
+        evict()
+    except Exception:
+        _count('failed')
+        with _lock:
+            _failed[url] = time.time()
+    finally:
+        with _lock:
+            _pending.discard(url)
+
+
+def evict(max_bytes=None):
+    """Delete least recently used thumbnails until the cache fits max_bytes."""
+    for name in db.evict_thumbnails(MAX_CACHE_BYTES if max_bytes is None else max_bytes):
+        try:
+            os.remove(os.path.join(STATIC_DIR, name))
+        except FileNotFoundError:
+            pass
+        _count('evicted')
+
+
+def local_urls(image_urls):
+    """{remote url: local thumbnail url} for cached ones; queue the others."""
+    urls = [u for u in dict.fromkeys(image_urls) if u and u.startswith(("http://", "https://"))]
+    if not ENABLED or not urls:
+        return {}
+    found = {}
+    stale = []
+    now = time.time()
+    for url, (name, last_access) in db.load_thumbnails(urls).items():
+        if os.path.exists(os.path.join(STATIC_DIR, name)):
+            found[url] = URL_PREFIX + name
+            if now - last_access > ACCESS_REFRESH:
+                stale.append(url)
+    if stale:
+        db.touch_thumbnails(stale)
+    _count('hits', len(found))
+    with _lock:
+        for url in urls:
+            if url in found or url in _pending or now - _failed.get(url, 0) < RETRY_AFTER:
+                continue
+            _failed.pop(url, None)
+            _pending.add(url)
+            _count('queued')
+            _executor.submit(_build_queued, url)
+    return found